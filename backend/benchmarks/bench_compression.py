@@ -0,0 +1,65 @@
+"""Benchmark: bytes on the wire and CPU cost of response compression
+
+Run with `python backend/benchmarks/bench_compression.py`. No database is
+needed; payloads are the JSON bodies of typical responses (the root message,
+the store catalog, and admin list pages), encoded the way the API sends them.
+For each, prints the compressed size and the CPU time per response for the
+gzip levels and brotli qualities worth considering.
+"""
+import gzip
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from bench_serialization import make_docs  # noqa: E402
+from compression import brotli  # noqa: E402
+from fast_json import dumps  # noqa: E402
+from server import SAMPLE_PRODUCTS  # noqa: E402
+
+DURATION = 0.2
+
+
+def payloads():
+    products = [{**product, "created_at": "2024-01-01T00:00:00"} for product in SAMPLE_PRODUCTS]
+    return [
+        ("root message", dumps({"message": "OpsVantage Digital API - Transforming businesses with AI-powered solutions"})),
+        ("store catalog", dumps(products)),
+        ("contacts page 100", dumps(make_docs(100))),
+        ("contacts page 1000", dumps(make_docs(1000))),
+    ]
+
+
+def codecs():
+    options = [(f"gzip {level}", lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0)) for level in (1, 6, 9)]
+    if brotli is not None:
+        options += [(f"br {quality}", lambda body, quality=quality: brotli.compress(body, quality=quality)) for quality in (1, 4, 11)]
+    return options
+
+
+def cpu_per_call(fn, body) -> float:
+    calls = 0
+    start = time.process_time()
+    while time.process_time() - start < DURATION:
+        fn(body)
+        calls += 1
+    return (time.process_time() - start) / calls
+
+
+def main():
+    if brotli is None:
+        print("brotli is not installed; showing gzip only")
+    print(f"{'payload':<20} {'codec':<8} {'bytes':>9} {'ratio':>7} {'cpu us':>9}")
+    for name, body in payloads():
+        print(f"{name:<20} {'none':<8} {len(body):>9} {1.0:>7.2f} {0.0:>9.1f}")
+        for codec, fn in codecs():
+            size = len(fn(body))
+            print(f"{'':<20} {codec:<8} {size:>9} {len(body) / size:>7.2f} {cpu_per_call(fn, body) * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: compiled chat intent matcher vs. the original substring scan
+
+Run with `python backend/benchmarks/bench_intents.py`. Measures messages per
+second for short and long messages, with and without a keyword, against the
+shipped intent table and a synthetic table with thousands of rules.
+"""
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from intents import IntentMatcher  # noqa: E402
+
+TABLE = Path(__file__).resolve().parents[1] / 'intents.json'
+DURATION = 1.0
+
+
+def substring_scan(intents, fallback, message):
+    # The pre-compilation handler: first rule with any substring hit wins
+    user_message = message.lower()
+    for intent in intents:
+        if any(word.rstrip("*") in user_message for word in intent["keywords"]):
+            return intent["response"]
+    return fallback
+
+
+def synthetic_intents(count):
+    rng = random.Random(42)
+    intents = []
+    for i in range(count):
+        keywords = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10))) for _ in range(5)]
+        intents.append({"name": f"intent{i}", "priority": count - i, "keywords": keywords, "response": f"response {i}"})
+    return intents
+
+
+def rate(fn, message):
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        fn(message)
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def report(label, intents, fallback, messages):
+    matcher = IntentMatcher(intents, fallback)
+    for message_label, message in messages:
+        legacy = rate(lambda m: substring_scan(intents, fallback, m), message)
+        compiled = rate(matcher.respond, message)
+        print(f"{label:<16} {message_label:<14} {legacy:>14.0f} {compiled:>14.0f} {compiled / legacy:>8.1f}x")
+
+
+def main():
+    matcher = IntentMatcher.from_file(TABLE)
+    filler = "please tell me more about the things your team can do for my company "
+    messages = [
+        ("short", "How much does web development cost?"),
+        ("long (10k ch)", (filler * (10000 // len(filler))) + "portfolio"),
+        ("long, no hit", filler * (10000 // len(filler))),
+    ]
+    print(f"{'table':<16} {'message':<14} {'legacy msg/s':>14} {'compiled msg/s':>14} {'speedup':>8}")
+    report(f"shipped ({len(matcher.intents)})", matcher.intents, matcher.fallback, messages)
+    for count in (1000, 5000):
+        report(f"synthetic ({count})", synthetic_intents(count), matcher.fallback, messages)
+
+
+if __name__ == "__main__":
+    main()
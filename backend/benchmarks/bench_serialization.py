@@ -0,0 +1,80 @@
+"""Micro-benchmark: default read serialization vs. the FAST_READS orjson path
+
+Run with `python backend/benchmarks/bench_serialization.py`. No database is
+needed; documents are generated in the shape Mongo returns them.
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from fast_json import FastJSONResponse  # noqa: E402
+from server import ContactForm  # noqa: E402
+
+SIZES = [1000, 10000]
+REPEAT = 5
+
+
+def make_docs(count: int) -> List[dict]:
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Lead {i}",
+            "email": f"lead{i}@example.com",
+            "company": "Acme Corp",
+            "phone": "+1234567890",
+            "service": "Web Development",
+            "message": "I need a new website for my business. " * 4,
+            "budget": "$5,000-$10,000",
+            "timestamp": datetime.utcnow().replace(microsecond=(i % 1000) * 1000),
+            "status": "new",
+        }
+        for i in range(count)
+    ]
+
+
+async def current_path(docs: List[dict], field) -> bytes:
+    # Handler builds models, FastAPI validates them against response_model and
+    # runs them through jsonable_encoder, then JSONResponse encodes with json
+    models = [ContactForm(**doc) for doc in docs]
+    content = await serialize_response(field=field, response_content=models, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def fast_path(docs: List[dict], field) -> bytes:
+    return FastJSONResponse(docs).body
+
+
+async def best_of(fn, docs, field) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await fn(docs, field)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+async def main():
+    field = create_response_field(name="Response_get_contact_forms", type_=List[ContactForm])
+    print(f"{'rows':>8} {'current ms':>12} {'fast ms':>10} {'speedup':>8}")
+    for size in SIZES:
+        docs = make_docs(size)
+        current = await best_of(current_path, docs, field)
+        fast = await best_of(fast_path, docs, field)
+        print(f"{size:>8} {current * 1000:>12.2f} {fast * 1000:>10.2f} {current / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""Benchmark: cold start of the API, from interpreter launch to first response
+
+Run with `python backend/benchmarks/bench_startup.py`. Measures, in fresh
+processes, how long `import server` takes (with the slowest imports from
+`python -X importtime`) and how long uvicorn takes from launch until
+GET /api/ first answers 200. Database setup runs in the background after
+startup, so no MongoDB needs to be reachable for either measurement.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+RUNS = 5
+
+
+def _environment(mongo_url: Optional[str] = None) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", mongo_url or "mongodb://127.0.0.1:27017")
+    env.setdefault("DB_NAME", "startup_benchmark")
+    # Fail the background database setup quickly when nothing is listening
+    env.setdefault("MONGO_SERVER_SELECTION_TIMEOUT_MS", "1000")
+    return env
+
+
+def import_profile(module: str = "server", mongo_url: Optional[str] = None) -> Tuple[float, List[Tuple[str, float]]]:
+    """Import `module` in a fresh interpreter; return its cumulative import
+    seconds and the (name, seconds) of its direct imports, slowest first"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=_environment(mongo_url), capture_output=True, text=True, check=True
+    )
+    total = 0.0
+    children = []
+    # importtime prints each module after its imports, indented one level deeper
+    pending = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        seconds = int(cumulative) / 1e6
+        if not name.startswith("  "):
+            if name.strip() == module:
+                total, children = seconds, pending
+            pending = []
+        elif not name.startswith("    "):
+            pending.append((name.strip(), seconds))
+    children.sort(key=lambda child: child[1], reverse=True)
+    return total, children
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_response(path: str = "/api/", mongo_url: Optional[str] = None, timeout: float = 30.0) -> float:
+    """Seconds from launching uvicorn until `path` first answers 200"""
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_environment(mongo_url), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if client.get(path).status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with status {process.returncode}")
+                time.sleep(0.01)
+        raise TimeoutError(f"No response from {path} within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def measure(runs: int = RUNS, mongo_url: Optional[str] = None) -> Dict[str, float]:
+    """Median import and first-response times over `runs` cold starts"""
+    imports = [import_profile(mongo_url=mongo_url)[0] for _ in range(runs)]
+    first_responses = [time_to_first_response(mongo_url=mongo_url) for _ in range(runs)]
+    return {
+        "import_ms": statistics.median(imports) * 1000,
+        "first_response_ms": statistics.median(first_responses) * 1000
+    }
+
+
+def main():
+    total, children = import_profile()
+    print(f"import server: {total * 1000:.1f} ms")
+    for name, seconds in children[:15]:
+        print(f"  {name:<40} {seconds * 1000:>8.1f} ms")
+    result = measure()
+    print(f"\nmedian of {RUNS} cold starts: import {result['import_ms']:.1f} ms, "
+          f"first response {result['first_response_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
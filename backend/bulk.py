@@ -0,0 +1,131 @@
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+# Per-row error listing is capped so a bad upload cannot produce a huge response
+MAX_REPORTED_ERRORS = 1000
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors())
+
+
+def _too_many_rows(max_rows: int) -> str:
+    return f"Uploads are limited to {max_rows} rows; split larger files"
+
+
+async def iter_rows(request: Request, max_rows: Optional[int] = None) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (row index, parsed row) from a JSON array or NDJSON request body
+
+    NDJSON is parsed line by line as the body streams in, so large uploads are
+    never held in memory whole. Rows that are not valid JSON are yielded as the
+    ValueError raised while parsing them. A JSON array longer than `max_rows`
+    is rejected with 413 before any row is yielded; streamed bodies are
+    capped by BulkIngest.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        index = 0
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    try:
+                        yield index, json.loads(line)
+                    except ValueError as e:
+                        yield index, e
+                    index += 1
+        if pending.strip():
+            try:
+                yield index, json.loads(pending)
+            except ValueError as e:
+                yield index, e
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if max_rows is not None and len(rows) > max_rows:
+        raise HTTPException(status_code=413, detail=_too_many_rows(max_rows))
+    for index, row in enumerate(rows):
+        yield index, row
+
+
+class BulkIngest:
+    """Validates uploaded rows in batches and writes each batch with one unordered insert_many
+
+    `create_model` validates a raw row and `model` builds the stored document
+    from it. Rows rejected by a unique index are counted as duplicates rather
+    than errors. An upload with more than `max_rows` rows is stopped with 413
+    at the first row past the limit; the error carries the report so far, as
+    batches already written stay imported.
+    """
+
+    def __init__(self, collection, create_model: Type[BaseModel], model: Type[BaseModel], batch_size: int = 1000,
+                 on_inserted: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+                 max_rows: Optional[int] = None):
+        self.collection = collection
+        self.create_model = create_model
+        self.model = model
+        self.batch_size = batch_size
+        self.on_inserted = on_inserted
+        self.max_rows = max_rows
+        self.report = {"received": 0, "inserted": 0, "duplicates": 0, "failed": 0, "errors": []}
+
+    def _error(self, index: int, message: str) -> None:
+        self.report["failed"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"index": index, "error": message})
+
+    async def _write(self, indexes: List[int], docs: List[Dict[str, Any]]) -> None:
+        rejected = set()
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                position = write_error["index"]
+                rejected.add(position)
+                if write_error.get("code") == DUPLICATE_KEY:
+                    self.report["duplicates"] += 1
+                else:
+                    self._error(indexes[position], write_error.get("errmsg", "Write failed"))
+        inserted = [doc for position, doc in enumerate(docs) if position not in rejected]
+        self.report["inserted"] += len(inserted)
+        if inserted and self.on_inserted is not None:
+            await self.on_inserted(inserted)
+
+    async def run(self, rows: AsyncIterator[Tuple[int, Any]]) -> Dict[str, Any]:
+        indexes: List[int] = []
+        docs: List[Dict[str, Any]] = []
+        async for index, row in rows:
+            if self.max_rows is not None and self.report["received"] >= self.max_rows:
+                raise HTTPException(status_code=413, detail={"error": _too_many_rows(self.max_rows), **self.report})
+            self.report["received"] += 1
+            if isinstance(row, ValueError):
+                self._error(index, f"Invalid JSON: {str(row)}")
+                continue
+            if not isinstance(row, dict):
+                self._error(index, "Row must be a JSON object")
+                continue
+            try:
+                docs.append(self.model(**self.create_model(**row).dict()).dict())
+                indexes.append(index)
+            except ValidationError as e:
+                self._error(index, _describe(e))
+                continue
+            if len(docs) >= self.batch_size:
+                await self._write(indexes, docs)
+                indexes, docs = [], []
+        if docs:
+            await self._write(indexes, docs)
+        return self.report
@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# A cached entry is the serialized JSON body plus its strong ETag
+CachedBody = Tuple[bytes, str]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class CatalogCache:
+    """Read-through, in-process cache of the serialized product catalog
+
+    Holds the full product list body and a size-bounded LRU of per-product
+    bodies. Everything expires after `ttl` seconds and can be dropped at any
+    time with `invalidate()`. Loaders return already-serialized JSON strings so
+    a cache hit never touches the database or Pydantic.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_items: int = 1000):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._list: Optional[CachedBody] = None
+        self._items: "OrderedDict[str, Tuple[CachedBody, float]]" = OrderedDict()
+        self._loaded_at = 0.0
+        # True when the per-id map holds every active product, so a miss is a definite 404
+        self._complete = False
+        self._lock = asyncio.Lock()
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at < self.ttl
+
+    def _remember(self, product_id: str, body: bytes, loaded_at: float) -> None:
+        self._items[product_id] = ((body, make_etag(body)), loaded_at)
+        self._items.move_to_end(product_id)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+            self._complete = False
+
+    async def get_list(self, loader: Callable[[], Awaitable[List[Tuple[str, str]]]]) -> CachedBody:
+        """Return the catalog body, loading `(id, json)` pairs through `loader` on a miss"""
+        if self._list is not None and self._fresh(self._loaded_at):
+            return self._list
+        async with self._lock:
+            # Another request may have reloaded while we waited for the lock
+            if self._list is not None and self._fresh(self._loaded_at):
+                return self._list
+            products = await loader()
+            loaded_at = time.monotonic()
+            body = ("[" + ",".join(product_json for _, product_json in products) + "]").encode()
+            self._items.clear()
+            self._complete = True
+            for product_id, product_json in products:
+                self._remember(product_id, product_json.encode(), loaded_at)
+            self._list = (body, make_etag(body))
+            self._loaded_at = loaded_at
+            return self._list
+
+    async def get_item(self, product_id: str, loader: Callable[[str], Awaitable[Optional[str]]]) -> Optional[CachedBody]:
+        """Return one product body, or None if the product does not exist"""
+        entry = self._items.get(product_id)
+        if entry is not None and self._fresh(entry[1]):
+            self._items.move_to_end(product_id)
+            return entry[0]
+        if entry is None and self._complete and self._fresh(self._loaded_at):
+            return None
+        product_json = await loader(product_id)
+        if product_json is None:
+            self._items.pop(product_id, None)
+            return None
+        self._remember(product_id, product_json.encode(), time.monotonic())
+        return self._items[product_id][0]
+
+    def invalidate(self, product_id: Optional[str] = None) -> None:
+        """Drop one product, or the whole catalog when no id is given
+
+        Dropping a single product also drops the list body, since it embeds
+        that product.
+        """
+        self._list = None
+        self._complete = False
+        if product_id is None:
+            self._items.clear()
+        else:
+            self._items.pop(product_id, None)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "list_cached": self._list is not None and self._fresh(self._loaded_at),
+            "items_cached": len(self._items),
+            "ttl": self.ttl,
+            "max_items": self.max_items,
+        }
@@ -0,0 +1,43 @@
+from collections import OrderedDict, deque
+from typing import Deque, Iterable, Optional
+
+
+class SessionWindows:
+    """The intents of the last few chat turns of each recently active session, kept in memory
+
+    Holds at most `turns` turns per session and `max_sessions` sessions; the
+    session used least recently is dropped first. Only each turn's intent is
+    kept, since that is all the responder reads, so memory does not grow with
+    message length. A session that is not here (new, evicted, or served by
+    another worker) can be seeded once from the database with `load`, after
+    which its context costs no reads.
+    """
+
+    def __init__(self, max_sessions: int = 10000, turns: int = 10):
+        self.max_sessions = max_sessions
+        self.turns = turns
+        self._sessions: "OrderedDict[str, Deque[Optional[str]]]" = OrderedDict()
+
+    def get(self, session_id: str) -> Optional[Deque[Optional[str]]]:
+        window = self._sessions.get(session_id)
+        if window is not None:
+            self._sessions.move_to_end(session_id)
+        return window
+
+    def load(self, session_id: str, intents: Iterable[Optional[str]]) -> Deque[Optional[str]]:
+        """Install a session's window from the intents of stored turns, oldest first"""
+        window = deque(intents, maxlen=self.turns)
+        self._sessions[session_id] = window
+        self._sessions.move_to_end(session_id)
+        if len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return window
+
+    def append(self, session_id: str, intent: Optional[str]) -> None:
+        window = self.get(session_id)
+        if window is None:
+            window = self.load(session_id, ())
+        window.append(intent)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
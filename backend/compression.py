@@ -0,0 +1,146 @@
+import gzip
+import zlib
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered
+    brotli = None
+
+# Content types worth compressing; images, archives and Parquet are already compact
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+
+
+def choose_encoding(accept_encoding: str, preferred: Tuple[str, ...]) -> Optional[str]:
+    """Pick the first of `preferred` the client accepts (q=0 means refused)"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.strip())
+    for encoding in preferred:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._stream = None
+
+    def whole(self, body: bytes) -> bytes:
+        if self.encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def chunk(self, body: bytes) -> bytes:
+        # Flushed per chunk so streamed rows reach the client as they are produced
+        if self._stream is None:
+            if self.encoding == "br":
+                self._stream = brotli.Compressor(quality=self.brotli_quality)
+            else:
+                self._stream = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        if self.encoding == "br":
+            return self._stream.process(body) + self._stream.flush()
+        return self._stream.compress(body) + self._stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._stream is None:
+            return self.whole(b"")
+        if self.encoding == "br":
+            return self._stream.finish()
+        return self._stream.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with brotli or gzip, as the client accepts
+
+    Bodies smaller than `minimum_size` are sent as is, since the framing
+    overhead outweighs the saving. Responses that are already encoded, not a
+    text-like type, or byte-addressable (Accept-Ranges / Content-Range, where
+    offsets refer to the uncompressed bytes) are left alone. A strong ETag
+    becomes weak on compressed responses, as the bytes no longer match it.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 1):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+        state = {"start": None, "active": None}
+
+        def compressible(headers: MutableHeaders, status: int) -> bool:
+            content_type = headers.get("content-type", "")
+            return (
+                status == 200
+                and "content-encoding" not in headers
+                and "content-range" not in headers
+                and "accept-ranges" not in headers
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+
+        def mark_encoded(headers: MutableHeaders) -> None:
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start = state["start"]
+            if state["active"] is None:
+                headers = MutableHeaders(scope=start)
+                body = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                if not compressible(headers, start["status"]) or (not more_body and len(body) < self.minimum_size):
+                    state["active"] = False
+                    await send(start)
+                    await send(message)
+                    return
+                state["active"] = True
+                mark_encoded(headers)
+                if not more_body:
+                    body = compressor.whole(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                await send(start)
+                await send({"type": "http.response.body", "body": compressor.chunk(body), "more_body": True})
+                return
+
+            if not state["active"]:
+                await send(message)
+                return
+            if message.get("more_body", False):
+                await send({"type": "http.response.body", "body": compressor.chunk(message.get("body", b"")), "more_body": True})
+            else:
+                body = compressor.chunk(message.get("body", b"")) if message.get("body") else b""
+                await send({"type": "http.response.body", "body": body + compressor.finish()})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Counters:
+    """Per-collection document tallies kept in a small `stats` collection
+
+    Each tracked collection has one stats document holding its total and, when
+    a status field is configured, a count per status value:
+
+        {"_id": "contact_forms", "total": 42, "by_status": {"new": 40, "closed": 2}}
+
+    Write handlers bump these with `record` as they insert, so reads are a
+    single small lookup. Increments can drift from the truth (a failed insert
+    after a counted one, writes from other tools), so `reconcile` periodically
+    replaces them with exact counts.
+    """
+
+    def __init__(self, db, tracked: Dict[str, Optional[str]], collection_name: str = "stats"):
+        self.db = db
+        # collection name -> name of its status field (or None)
+        self.tracked = tracked
+        self.collection_name = collection_name
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def stats(self):
+        return self.db[self.collection_name]
+
+    async def record(self, collection: str, status: Optional[str] = None, n: int = 1) -> None:
+        """Count `n` new documents in a collection, optionally under a status"""
+        increments = {"total": n}
+        if status is not None:
+            increments[f"by_status.{status}"] = n
+        try:
+            await self.stats.update_one({"_id": collection}, {"$inc": increments}, upsert=True)
+        except Exception as e:
+            logger.error(f"Failed to update counters for {collection}: {str(e)}")
+
+    async def move(self, collection: str, from_status: str, to_status: str, n: int = 1) -> None:
+        """Move `n` documents between status tallies without changing the total"""
+        increments = {f"by_status.{from_status}": -n, f"by_status.{to_status}": n}
+        try:
+            await self.stats.update_one({"_id": collection}, {"$inc": increments}, upsert=True)
+        except Exception as e:
+            logger.error(f"Failed to update counters for {collection}: {str(e)}")
+
+    async def read(self) -> Dict[str, Dict[str, Any]]:
+        """Return the stats document of every tracked collection, keyed by name"""
+        docs = await self.stats.find({"_id": {"$in": list(self.tracked)}}).to_list(len(self.tracked))
+        return {doc["_id"]: doc for doc in docs}
+
+    async def exact(self, collection: str) -> Dict[str, Any]:
+        total = await self.db[collection].count_documents({})
+        by_status = {}
+        status_field = self.tracked[collection]
+        if status_field:
+            pipeline = [{"$group": {"_id": f"${status_field}", "count": {"$sum": 1}}}]
+            async for bucket in self.db[collection].aggregate(pipeline):
+                if bucket["_id"] is not None:
+                    by_status[str(bucket["_id"])] = bucket["count"]
+        return {"_id": collection, "total": total, "by_status": by_status}
+
+    async def reconcile(self) -> None:
+        """Replace every tracked tally with an exact count"""
+        for collection in self.tracked:
+            try:
+                await self.stats.replace_one({"_id": collection}, await self.exact(collection), upsert=True)
+            except Exception as e:
+                logger.error(f"Failed to reconcile counters for {collection}: {str(e)}")
+
+    async def _reconcile_forever(self, interval: float) -> None:
+        while True:
+            await self.reconcile()
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float) -> None:
+        """Reconcile now and then every `interval` seconds in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._reconcile_forever(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,33 @@
+from typing import Any, Dict, Type
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson
+
+    Returning one of these from a handler bypasses FastAPI's response_model
+    validation and jsonable_encoder, so it must only carry documents that were
+    written from the declared models in the first place.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content)
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Mongo projection selecting exactly the model's fields and dropping `_id`"""
+    projection = {name: 1 for name in model.model_fields}
+    projection["_id"] = 0
+    return projection
+
+
+def dumps_line(doc: Dict[str, Any]) -> bytes:
+    """Encode a projected document as one NDJSON line"""
+    return orjson.dumps(doc, option=orjson.OPT_APPEND_NEWLINE)
@@ -0,0 +1,66 @@
+from typing import Dict, Iterable
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from catalog_cache import etag_matches, make_etag
+
+
+class HTTPCacheMiddleware:
+    """ASGI middleware adding Cache-Control, ETag and 304 handling to selected GET routes
+
+    `policies` maps a route template (e.g. "/api/store/products/{product_id}")
+    to its Cache-Control value. For those routes a 200 without an ETag has
+    its body buffered and hashed into one, and a request whose If-None-Match
+    matches gets a bodiless 304 instead. Routes that set their own ETag (and
+    answer conditionals themselves) only get the Cache-Control header, as do
+    the routes in `without_etag`, whose bodies change on every call (e.g. a
+    generated_at timestamp) so a hashed ETag would never match.
+    """
+
+    def __init__(self, app, policies: Dict[str, str], without_etag: Iterable[str] = ()):
+        self.app = app
+        self.policies = policies
+        self.without_etag = frozenset(without_etag)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "policy": None, "body": []}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                path = getattr(scope.get("route"), "path", None)
+                policy = self.policies.get(path)
+                if policy is None or message["status"] not in (200, 304):
+                    await send(message)
+                    return
+                headers = MutableHeaders(scope=message)
+                if "cache-control" not in headers:
+                    headers["Cache-Control"] = policy
+                if message["status"] == 304 or "etag" in headers or path in self.without_etag:
+                    await send(message)
+                    return
+                state["start"] = message
+                return
+            if state["start"] is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            state["body"].append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            start, body = state["start"], b"".join(state["body"])
+            headers = MutableHeaders(scope=start)
+            etag = make_etag(body)
+            headers["ETag"] = etag
+            if etag_matches(Headers(scope=scope).get("if-none-match"), etag):
+                start["status"] = 304
+                for name in ("content-length", "content-type"):
+                    del headers[name]
+                body = b""
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,142 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Index options that change an index's behaviour and therefore count as drift
+# when the deployed index differs from the declared one.
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _declared_spec(index: IndexModel) -> Dict[str, Any]:
+    document = index.document
+    key = [(field, direction) for field, direction in document["key"].items() if direction != "text"]
+    spec = {"key": key}
+    text_fields = [field for field, direction in document["key"].items() if direction == "text"]
+    if text_fields:
+        weights = document.get("weights", {})
+        spec["weights"] = {field: weights.get(field, 1) for field in text_fields}
+    for option in _COMPARED_OPTIONS:
+        if option in document:
+            spec[option] = document[option]
+    return spec
+
+
+def _deployed_spec(info: Dict[str, Any]) -> Dict[str, Any]:
+    # MongoDB reports text indexes as internal _fts/_ftsx keys plus a weights map
+    key = [
+        (field, int(direction) if isinstance(direction, float) else direction)
+        for field, direction in info["key"] if field not in ("_fts", "_ftsx") and direction != "text"
+    ]
+    spec = {"key": key}
+    text_fields = [field for field, direction in info["key"] if direction == "text" and field != "_fts"]
+    if "weights" in info:
+        spec["weights"] = {field: int(weight) for field, weight in info["weights"].items()}
+    elif text_fields:
+        spec["weights"] = {field: 1 for field in text_fields}
+    for option in _COMPARED_OPTIONS:
+        if option in info:
+            spec[option] = info[option]
+    return spec
+
+
+async def index_drift(db, registry: Dict[str, List[IndexModel]]) -> Dict[str, Dict[str, List[str]]]:
+    """Compare declared indexes with what the database actually has
+
+    Returns, per collection, the names of declared indexes that are missing,
+    deployed indexes that differ from their declaration, and deployed indexes
+    that are not declared at all. Collections without drift are omitted.
+    """
+    report = {}
+    for collection_name, indexes in registry.items():
+        deployed = await db[collection_name].index_information()
+        deployed.pop("_id_", None)
+        declared = {index.document["name"]: index for index in indexes}
+
+        missing = [name for name in declared if name not in deployed]
+        changed = [
+            name for name, index in declared.items()
+            if name in deployed and _declared_spec(index) != _deployed_spec(deployed[name])
+        ]
+        extra = [name for name in deployed if name not in declared]
+
+        if missing or changed or extra:
+            report[collection_name] = {"missing": missing, "changed": changed, "extra": extra}
+    return report
+
+
+async def _update_expiry(db, collection_name: str, indexes: List[IndexModel]) -> None:
+    """Apply a changed expireAfterSeconds to deployed TTL indexes in place
+
+    create_indexes rejects an existing index whose options differ, so a new
+    retention period would otherwise only ever show up as drift.
+    """
+    deployed = await db[collection_name].index_information()
+    for index in indexes:
+        document = index.document
+        info = deployed.get(document["name"])
+        if "expireAfterSeconds" not in document or info is None or "expireAfterSeconds" not in info:
+            continue
+        if info["expireAfterSeconds"] == document["expireAfterSeconds"]:
+            continue
+        try:
+            await db.command("collMod", collection_name, index={"name": document["name"], "expireAfterSeconds": document["expireAfterSeconds"]})
+            logger.info(f"Changed expiry of {collection_name}.{document['name']} to {document['expireAfterSeconds']}s")
+        except OperationFailure as e:
+            logger.error(f"Failed to change expiry of {collection_name}.{document['name']}: {str(e)}")
+
+
+async def ensure_indexes(db, registry: Dict[str, List[IndexModel]]) -> Dict[str, Dict[str, List[str]]]:
+    """Create every declared index and return the drift left over afterwards
+
+    Index creation is idempotent, so this is safe to run on every startup. An
+    index that cannot be built (conflicting definition, duplicate keys under a
+    unique index) is logged and left for the drift report rather than aborting
+    startup. A TTL index whose expiry changed is updated with collMod.
+    """
+    for collection_name, indexes in registry.items():
+        await _update_expiry(db, collection_name, indexes)
+        # One at a time, so an index that cannot be built does not hold back the others
+        for index in indexes:
+            try:
+                await db[collection_name].create_indexes([index])
+            except OperationFailure as e:
+                logger.error(f"Failed to create index {index.document['name']} on {collection_name}: {str(e)}")
+
+    drift = await index_drift(db, registry)
+    for collection_name, details in drift.items():
+        logger.warning(f"Index drift on {collection_name}: {details}")
+    return drift
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    if "inputStage" in plan:
+        stages.extend(_plan_stages(plan["inputStage"]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def query_plan_stages(collection, query: Dict[str, Any], sort: Optional[List] = None) -> List[str]:
+    """Return the stage names of the winning plan for a find, via explain()"""
+    cursor = collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    explanation = await cursor.explain()
+    winning_plan = explanation["queryPlanner"]["winningPlan"]
+    # Newer servers wrap the classic plan under "queryPlan" when the slot-based engine is used
+    return _plan_stages(winning_plan.get("queryPlan", winning_plan))
+
+
+async def queries_missing_index(db, checks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return the checks whose query falls back to a collection scan or an in-memory sort"""
+    failures = []
+    for check in checks:
+        stages = await query_plan_stages(db[check["collection"]], check["query"], check.get("sort"))
+        if "COLLSCAN" in stages or "SORT" in stages:
+            failures.append({**check, "stages": stages})
+    return failures
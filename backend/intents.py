@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9']+")
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789'")
+
+# Tables with at most this many keywords are matched by searching the message
+# for each keyword, best ranked first: for a handful of keywords that beats
+# tokenizing the message, which larger tables need to stay independent of
+# their size
+SCAN_KEYWORDS = 64
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+class IntentMatcher:
+    """Keyword intent table compiled into a single phrase lookup
+
+    Each intent has a name, a priority, a list of keywords (single words or
+    multi-word phrases) and a response. Compilation maps every keyword phrase to
+    the highest-priority intent that declares it, so matching a message is one
+    pass over its distinct words with a dictionary lookup per word n-gram,
+    independent of how many rules exist. Tables of up to `scan_keywords`
+    keywords are instead matched by searching for each keyword in rank order
+    and stopping at the first whole-word hit. Keywords only match whole words:
+    "ai" does not match "said". A single-word keyword ending in "*" is a stem
+    and matches any word it starts: "price*" matches "prices" and "priced".
+    """
+
+    def __init__(self, intents: List[Dict[str, Any]], fallback: str, scan_keywords: int = SCAN_KEYWORDS):
+        self.fallback = fallback
+        self.intents = intents
+        self._phrases: Dict[Tuple[str, ...], Tuple[int, int, str]] = {}
+        self._stems: Dict[str, Tuple[int, int, str]] = {}
+        for order, intent in enumerate(intents):
+            # Earlier declarations win ties, so rank is (priority, -order)
+            rank = (intent.get("priority", 0), -order)
+            for keyword in intent["keywords"]:
+                phrase = tuple(_tokens(keyword))
+                if not phrase:
+                    continue
+                table = self._phrases
+                if keyword.strip().endswith("*") and len(phrase) == 1:
+                    table, phrase = self._stems, phrase[0]
+                current = table.get(phrase)
+                if current is None or rank > current[:2]:
+                    table[phrase] = (*rank, intent["name"])
+        # Single words are looked up directly; longer phrases are only tried
+        # from positions whose word starts one of them
+        self._words = {phrase[0]: hit for phrase, hit in self._phrases.items() if len(phrase) == 1}
+        self._heads: Dict[str, List[Tuple[str, ...]]] = {}
+        for phrase in self._phrases:
+            if len(phrase) > 1:
+                self._heads.setdefault(phrase[0], []).append(phrase)
+        # A word is checked against stems by looking up its prefixes of each stem length
+        self._stem_lengths = sorted({len(stem) for stem in self._stems})
+        self._responses = {intent["name"]: intent["response"] for intent in intents}
+        # Keyword searches, best ranked first, for tables small enough to scan
+        self._scan: Optional[List[Tuple[Tuple[int, int], "re.Pattern[str]", str]]] = None
+        if len(self._phrases) + len(self._stems) <= scan_keywords:
+            searches = [
+                (hit[:2], re.compile(r"[^a-z0-9']+".join(map(re.escape, phrase)) + r"(?![a-z0-9'])"), hit[2])
+                for phrase, hit in self._phrases.items()
+            ]
+            searches += [(hit[:2], re.compile(re.escape(stem)), hit[2]) for stem, hit in self._stems.items()]
+            self._scan = sorted(searches, key=lambda search: search[0], reverse=True)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "IntentMatcher":
+        with open(path, encoding="utf-8") as f:
+            table = json.load(f)
+        return cls(table["intents"], table["fallback"])
+
+    def _scan_match(self, text: str) -> Optional[str]:
+        for _, pattern, name in self._scan:
+            # Patterns start with a literal, so search skips ahead quickly;
+            # the word boundary before a hit is checked here
+            found = pattern.search(text)
+            while found is not None:
+                start = found.start()
+                if start == 0 or text[start - 1] not in _WORD_CHARS:
+                    return name
+                found = pattern.search(text, start + 1)
+        return None
+
+    def match(self, message: str) -> Optional[str]:
+        """Return the name of the best matching intent, or None"""
+        if self._scan is not None:
+            return self._scan_match(message.lower())
+        words = _tokens(message)
+        # Single words and stems do not depend on position, so each distinct word is checked once
+        distinct = set(words)
+        hits = [hit for hit in map(self._words.get, distinct) if hit is not None]
+        for word in distinct:
+            for length in self._stem_lengths:
+                if length > len(word):
+                    break
+                hit = self._stems.get(word[:length])
+                if hit is not None:
+                    hits.append(hit)
+        if self._heads:
+            for start, word in enumerate(words):
+                for phrase in self._heads.get(word, ()):
+                    if tuple(words[start:start + len(phrase)]) == phrase:
+                        hits.append(self._phrases[phrase])
+        return max(hits)[2] if hits else None
+
+    def respond(self, message: str) -> str:
+        intent = self.match(message)
+        return self._responses[intent] if intent else self.fallback
+
+    def reply(self, message: str, recent_intents: Iterable[Optional[str]] = ()) -> Tuple[Optional[str], str]:
+        """Return the intent and response for a message in a conversation
+
+        A message that matches nothing on its own ("yes please", "how much
+        would that be?") is taken as a follow-up on the most recent topic in
+        `recent_intents`, newest first.
+        """
+        intent = self.match(message) or next((name for name in recent_intents if name in self._responses), None)
+        return intent, self._responses[intent] if intent else self.fallback
+
+
+class ReloadingIntentMatcher:
+    """Serves an IntentMatcher from a JSON file, recompiling it when the file changes
+
+    The file's mtime is checked at most every `check_interval` seconds. A file
+    that fails to load is logged and the previous table stays in service.
+    """
+
+    def __init__(self, path: Path, check_interval: float = 5.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._mtime = os.stat(self.path).st_mtime
+        self._checked_at = time.monotonic()
+        self.matcher = IntentMatcher.from_file(self.path)
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self._mtime:
+                self.matcher = IntentMatcher.from_file(self.path)
+                self._mtime = mtime
+                logger.info(f"Reloaded chat intents from {self.path}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to reload chat intents from {self.path}: {str(e)}")
+
+    def respond(self, message: str) -> str:
+        self._maybe_reload()
+        return self.matcher.respond(message)
+
+    def reply(self, message: str, recent_intents: Iterable[Optional[str]] = ()) -> Tuple[Optional[str], str]:
+        self._maybe_reload()
+        return self.matcher.reply(message, recent_intents)
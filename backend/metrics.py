@@ -0,0 +1,277 @@
+import bisect
+import cProfile
+import heapq
+import io
+import itertools
+import pstats
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+# Upper bounds in seconds, covering sub-millisecond cache hits up to slow exports
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram for one label set
+
+    Observing is a bisect plus two additions under a lock, cheap enough for
+    every request and every Mongo command. Quantiles are estimated by linear
+    interpolation within the bucket that holds them.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for position, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[position - 1] if position > 0 else 0.0
+                if position == len(self.buckets):
+                    return lower
+                upper = self.buckets[position]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def snapshot(self) -> "Histogram":
+        """Consistent copy for rendering while observations continue"""
+        copy = Histogram(self.buckets)
+        with self._lock:
+            copy.counts = list(self.counts)
+            copy.sum = self.sum
+            copy.count = self.count
+        return copy
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def gauge_add(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def gauge_set(self, name: str, labels: Labels = (), value: float = 0) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[labels] = value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        # Called from Motor's executor threads too; new series are only added
+        # under the lock so render() never sees a dict change size mid-iteration
+        histogram = self._histograms.get(name, {}).get(labels)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, {}).setdefault(labels, Histogram())
+        histogram.observe(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+        histograms = {
+            name: {labels: histogram.snapshot() for labels, histogram in series.items()}
+            for name, series in histograms.items()
+        }
+
+        def header(name: str, default_kind: str) -> None:
+            kind, help_text = self._help.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in sorted(counters.items()):
+            header(name, "counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for name, series in sorted(gauges.items()):
+            header(name, "gauge")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for name, series in sorted(histograms.items()):
+            header(name, "histogram")
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            # Pre-computed percentiles for dashboards that do not run histogram_quantile
+            quantile_name = f"{name}_quantile"
+            lines.append(f"# HELP {quantile_name} Estimated {name} percentiles")
+            lines.append(f"# TYPE {quantile_name} gauge")
+            for labels, histogram in sorted(series.items()):
+                for q in QUANTILES:
+                    lines.append(f"{quantile_name}{_format_labels(labels, ('quantile', str(q)))} {histogram.quantile(q)!r}")
+        return "\n".join(lines) + "\n"
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Records the duration of every Mongo command by command name and collection"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self._collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event, outcome: str) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        labels = (("command", event.command_name), ("collection", collection))
+        self.registry.observe("mongodb_command_duration_seconds", labels, event.duration_micros / 1e6)
+        if outcome == "failed":
+            self.registry.inc("mongodb_command_failures_total", labels)
+
+    def succeeded(self, event):
+        self._finish(event, "succeeded")
+
+    def failed(self, event):
+        self._finish(event, "failed")
+
+
+class SlowRequestLog:
+    """Keeps the slowest requests seen, optionally with a cProfile of sampled ones
+
+    When `sample_rate` is above zero, that fraction of requests runs under
+    cProfile (one at a time, since the profiler is per-interpreter). The
+    profile covers everything the event loop ran during the request, so
+    concurrent requests show up in it too.
+    """
+
+    def __init__(self, size: int = 20, sample_rate: float = 0.0):
+        self.size = size
+        self.sample_rate = sample_rate
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._sequence = itertools.count()
+        self._profiling = False
+
+    def start_profile(self) -> Optional[cProfile.Profile]:
+        if self.sample_rate <= 0 or self._profiling or random.random() >= self.sample_rate:
+            return None
+        self._profiling = True
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def record(self, entry: Dict[str, Any], profile: Optional[cProfile.Profile] = None) -> None:
+        if profile is not None:
+            profile.disable()
+            self._profiling = False
+        if self.size <= 0:
+            return
+        if len(self._heap) >= self.size and entry["duration_seconds"] <= self._heap[0][0]:
+            return
+        if profile is not None:
+            output = io.StringIO()
+            pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(25)
+            entry["profile"] = output.getvalue()
+        item = (entry["duration_seconds"], next(self._sequence), entry)
+        if len(self._heap) >= self.size:
+            heapq.heapreplace(self._heap, item)
+        else:
+            heapq.heappush(self._heap, item)
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        return [entry for _, _, entry in sorted(self._heap, reverse=True)]
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method, route template and status"""
+
+    def __init__(self, app, registry: MetricsRegistry, slow_requests: Optional[SlowRequestLog] = None):
+        self.app = app
+        self.registry = registry
+        self.slow_requests = slow_requests
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        profile = self.slow_requests.start_profile() if self.slow_requests else None
+        self.registry.gauge_add("http_requests_in_flight")
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            self.registry.gauge_add("http_requests_in_flight", value=-1)
+            route = scope.get("route")
+            # Label by route template, not raw path, to keep cardinality bounded
+            route_path = getattr(route, "path", "unmatched")
+            labels = (("method", scope["method"]), ("route", route_path))
+            self.registry.observe("http_request_duration_seconds", labels, duration)
+            self.registry.inc("http_requests_total", labels + (("status", str(status["code"])),))
+            if status["code"] >= 500:
+                self.registry.inc("http_request_errors_total", labels)
+            if self.slow_requests is not None:
+                self.slow_requests.record({
+                    "method": scope["method"],
+                    "route": route_path,
+                    "path": scope["path"],
+                    "status": status["code"],
+                    "duration_seconds": duration,
+                    "started_at": started_at.isoformat()
+                }, profile)
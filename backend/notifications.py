@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import queue
+import random
+import smtplib
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Subject and body templates per notification kind, filled from the submission
+TEMPLATES: Dict[str, Dict[str, str]] = {
+    "contact_form": {
+        "subject": "New contact form submission from {name}",
+        "body": (
+            "Name: {name}\n"
+            "Email: {email}\n"
+            "Company: {company}\n"
+            "Phone: {phone}\n"
+            "Service: {service}\n"
+            "Budget: {budget}\n"
+            "Submitted: {timestamp}\n\n"
+            "{message}\n"
+        )
+    },
+    "service_inquiry": {
+        "subject": "New {service_id} inquiry from {client_name}",
+        "body": (
+            "Client: {client_name}\n"
+            "Email: {client_email}\n"
+            "Phone: {client_phone}\n"
+            "Service: {service_id}\n"
+            "Budget: {budget_range}\n"
+            "Timeline: {timeline}\n"
+            "Submitted: {timestamp}\n\n"
+            "{project_details}\n"
+        )
+    },
+}
+
+
+class _Blank(dict):
+    def __missing__(self, key):
+        return ""
+
+
+def _header_value(value: str) -> str:
+    # Submitted values end up in the Subject; EmailMessage rejects header values with line breaks
+    return " ".join(value.splitlines())
+
+
+def render(kind: str, payload: Dict[str, Any], sender: str, recipient: str) -> EmailMessage:
+    values = _Blank({key: "" if value is None else value for key, value in payload.items()})
+    template = TEMPLATES[kind]
+    message = EmailMessage()
+    message["Subject"] = _header_value(template["subject"].format_map(values))
+    message["From"] = sender
+    message["To"] = recipient
+    message.set_content(template["body"].format_map(values))
+    return message
+
+
+class SMTPConnectionPool:
+    """Reuses authenticated SMTP connections across sends
+
+    smtplib is blocking, so `send` is meant to run in a worker thread. Idle
+    connections are checked with NOOP before reuse; a connection that fails
+    mid-send is closed instead of returned to the pool.
+    """
+
+    def __init__(self, host: str, port: int = 25, username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: bool = False, size: int = 2, timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue(maxsize=size)
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        return connection
+
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._discard(connection)
+
+    def _discard(self, connection: smtplib.SMTP) -> None:
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def send(self, message: EmailMessage) -> None:
+        connection = self._acquire()
+        try:
+            connection.send_message(message)
+        except Exception:
+            self._discard(connection)
+            raise
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            self._discard(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class NotificationOutbox:
+    """Durable outbox of notification emails drained by a pool of asyncio workers
+
+    Form handlers only insert a pending outbox document. Workers claim jobs
+    with an atomic find_one_and_update, so several processes can share one
+    outbox, and send them through the SMTP pool. A failed send is retried with
+    exponential backoff; after `max_attempts` the job is dead-lettered with
+    status "dead" and its last error kept for inspection.
+    """
+
+    def __init__(self, db, pool: SMTPConnectionPool, sender: str, recipient: str, workers: int = 2,
+                 max_attempts: int = 5, backoff: float = 30.0, poll_interval: float = 5.0, lease: float = 120.0,
+                 collection_name: str = "notification_outbox"):
+        self.db = db
+        self.pool = pool
+        self.sender = sender
+        self.recipient = recipient
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.collection_name = collection_name
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    @property
+    def outbox(self):
+        return self.db[self.collection_name]
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any]) -> None:
+        now = datetime.utcnow()
+        await self.outbox.insert_one({
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "last_error": None
+        })
+        self._wakeup.set()
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await self.outbox.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                # A worker that died mid-send leaves its job leased; take it over once the lease expires
+                {"status": "sending", "next_attempt_at": {"$lte": now}}
+            ]},
+            {"$set": {"status": "sending", "next_attempt_at": now + timedelta(seconds=self.lease)}},
+            sort=[("next_attempt_at", 1)],
+            # Only id, kind, payload and attempts are used, none of which the claim changes
+            return_document=ReturnDocument.BEFORE
+        )
+
+    async def _fail(self, job: Dict[str, Any], error: Exception, permanent: bool = False) -> None:
+        attempts = job["attempts"] + 1
+        if permanent or attempts >= self.max_attempts:
+            update = {"status": "dead", "attempts": attempts, "last_error": str(error), "dead_at": datetime.utcnow()}
+            logger.error(f"Notification {job['id']} dead-lettered after {attempts} attempts: {str(error)}")
+        else:
+            delay = self.backoff * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+            update = {
+                "status": "pending",
+                "attempts": attempts,
+                "last_error": str(error),
+                "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay)
+            }
+            logger.warning(f"Notification {job['id']} failed (attempt {attempts}), retrying in {delay:.0f}s: {str(error)}")
+        await self.outbox.update_one({"id": job["id"]}, {"$set": update})
+
+    async def _deliver(self, job: Dict[str, Any]) -> None:
+        try:
+            message = render(job["kind"], job["payload"], self.sender, self.recipient)
+        except Exception as e:
+            # A job that cannot be rendered fails the same way on every attempt
+            await self._fail(job, e, permanent=True)
+            return
+        try:
+            await asyncio.to_thread(self.pool.send, message)
+        except Exception as e:
+            await self._fail(job, e)
+            return
+        await self.outbox.update_one(
+            {"id": job["id"]},
+            {"$set": {"status": "sent", "attempts": job["attempts"] + 1, "sent_at": datetime.utcnow()}}
+        )
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Failed to claim notification: {str(e)}")
+                job = None
+            if job is None:
+                if self._stopping:
+                    return
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._deliver(job)
+            except Exception as e:
+                # The outcome could not be recorded; the job stays leased and is retried once the lease expires
+                logger.error(f"Failed to record notification {job['id']}: {str(e)}")
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._stopping = False
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let workers finish the job in hand, then stop them
+
+        Workers still sending after `timeout` are cancelled; their jobs stay
+        leased and are picked up again by any worker once the lease expires.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._tasks:
+            _, unfinished = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.pool.close)
+
+    async def requeue_dead(self) -> int:
+        """Give every dead-lettered job a fresh set of attempts"""
+        result = await self.outbox.update_many(
+            {"status": "dead"},
+            {"$set": {"status": "pending", "attempts": 0, "next_attempt_at": datetime.utcnow()}}
+        )
+        if result.modified_count:
+            self._wakeup.set()
+        return result.modified_count
+
+    async def counts(self) -> Dict[str, int]:
+        pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        return {group["_id"]: group["count"] async for group in self.outbox.aggregate(pipeline)}
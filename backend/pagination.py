@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from fast_json import dumps_line, model_projection
+
+# Keyset ordering shared by every paginated admin list: newest first, with the
+# row id breaking ties between documents written in the same millisecond.
+KEYSET_SORT = [("timestamp", -1), ("id", -1)]
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    """Build an opaque cursor pointing just past the given document"""
+    payload = json.dumps({"t": doc["timestamp"].isoformat(), "i": doc["id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor, raising 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_query(base_query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """Restrict a query to rows that sort strictly after the cursor"""
+    if not cursor:
+        return base_query
+    timestamp, last_id = decode_cursor(cursor)
+    after_cursor = {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "id": {"$lt": last_id}},
+    ]}
+    if not base_query:
+        return after_cursor
+    return {"$and": [base_query, after_cursor]}
+
+
+async def fetch_page(collection, query: Dict[str, Any], cursor: Optional[str], limit: int, projection: Optional[Dict[str, int]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch one page of documents and the cursor for the next page (None on the last page)"""
+    docs = await collection.find(keyset_query(query, cursor), projection or {"_id": 0}).sort(KEYSET_SORT).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1])
+
+
+async def stream_ndjson(collection, query: Dict[str, Any], cursor: Optional[str], model: Type[BaseModel], fast: bool = False) -> AsyncIterator[bytes]:
+    """Yield every matching document as one JSON line, iterating the Motor cursor lazily
+
+    With `fast`, documents are encoded directly with orjson instead of being
+    rebuilt as models first.
+    """
+    async for doc in collection.find(keyset_query(query, cursor), model_projection(model)).sort(KEYSET_SORT):
+        if fast:
+            yield dumps_line(doc)
+        else:
+            yield (model(**doc).json() + "\n").encode()
@@ -0,0 +1,128 @@
+import ipaddress
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from pymongo import ReturnDocument
+
+# policy name -> (burst capacity, seconds to refill a full bucket)
+Policy = Tuple[int, float]
+
+
+def parse_policy(value: str) -> Policy:
+    """Parse a "capacity/seconds" limit such as "5/60" (five requests a minute, burst of five)"""
+    capacity, period = value.split("/")
+    return int(capacity), float(period)
+
+
+def client_ip(request: Request, trust_forwarded_for: bool = False) -> str:
+    """Address to key per-client limits on
+
+    uvicorn replaces the peer with the forwarded client when the peer is listed
+    in FORWARDED_ALLOW_IPS. A private peer whose X-Forwarded-For was not
+    applied is a proxy uvicorn was not told about; keying on it would put
+    every visitor in one bucket, so the last hop is used instead: that is the
+    address the proxy itself saw, which a client cannot forge.
+    """
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if trust_forwarded_for and forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    if not request.client:
+        return "unknown"
+    host = request.client.host
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if hops and host not in hops:
+            try:
+                if ipaddress.ip_address(host).is_private:
+                    return hops[-1]
+            except ValueError:
+                pass
+    return host
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process, least recently used evicted first
+
+    A bucket that has been idle for a full refill period is indistinguishable
+    from a new one, so evicting idle buckets costs nothing but a lookup while
+    keeping memory bounded by `max_keys` under a flood of distinct clients.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        """Take one token; return 0 if granted, else the seconds until one is available"""
+        now = time.monotonic()
+        rate = capacity / period
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class MongoBucketStore:
+    """Token buckets in a Mongo collection, shared by every worker process
+
+    Each take is a single pipeline-style find_one_and_update (MongoDB 4.2+),
+    so concurrent workers cannot double-spend a token. Buckets carry an
+    `expires_at` for a TTL index to remove them once idle.
+    """
+
+    def __init__(self, db, collection_name: str = "rate_limits"):
+        self.db = db
+        self.collection_name = collection_name
+
+    @property
+    def buckets(self):
+        return self.db[self.collection_name]
+
+    async def take(self, key: str, capacity: int, period: float) -> float:
+        now = datetime.utcnow()
+        rate = capacity / period
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]}]}
+        bucket = await self.buckets.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now, "expires_at": now + timedelta(seconds=period)}},
+                {"$set": {"granted": {"$gte": ["$tokens", 1]}}},
+                {"$set": {"tokens": {"$cond": ["$granted", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return 0.0 if bucket["granted"] else (1 - bucket["tokens"]) / rate
+
+
+class RateLimiter:
+    """Applies named token-bucket policies and rejects over-limit calls with 429"""
+
+    def __init__(self, store, policies: Dict[str, Policy], enabled: bool = True):
+        self.store = store
+        self.policies = policies
+        self.enabled = enabled
+
+    async def hit(self, policy: str, key: str) -> None:
+        if not self.enabled:
+            return
+        capacity, period = self.policies[policy]
+        wait = await self.store.take(f"{policy}:{key}", capacity, period)
+        if wait > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
@@ -0,0 +1,38 @@
+"""
+Run the API with several worker processes
+
+    WEB_CONCURRENCY=4 python serve.py
+
+Each worker is a separate process with its own Mongo pool, caches and
+in-memory rate limit buckets (set RATE_LIMIT_BACKEND=mongo to share limits).
+Startup is safe to run concurrently: index creation and sample seeding are
+idempotent. On SIGTERM uvicorn stops accepting connections, waits up to
+GRACEFUL_SHUTDOWN_TIMEOUT seconds for in-flight requests, then runs the
+app's shutdown, which flushes queued writes and finishes pending sends.
+
+Behind a reverse proxy or ingress, set FORWARDED_ALLOW_IPS to the proxy's
+address (comma-separated, or "*" when only the proxy can reach the workers).
+uvicorn then takes the visitor's address from X-Forwarded-For, which the
+per-IP rate limits key on. A private proxy that is not listed is still
+handled: limits then key on the last X-Forwarded-For hop, the address that
+proxy appended.
+"""
+import os
+
+import uvicorn
+
+
+def main():
+    uvicorn.run(
+        "server:app",
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', '8001')),
+        workers=int(os.environ.get('WEB_CONCURRENCY', '1')),
+        proxy_headers=True,
+        forwarded_allow_ips=os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1'),
+        timeout_graceful_shutdown=int(os.environ.get('GRACEFUL_SHUTDOWN_TIMEOUT', '30')),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,212 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+from collections import OrderedDict
 import os
+import re
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from counters import Counters
+from compression import CompressionMiddleware
+from bulk import BulkIngest, iter_rows
+from chat_sessions import SessionWindows
+from catalog_cache import CatalogCache, etag_matches
+from export import EXPORT_SORT, MEDIA_TYPES, byte_slice, export_chunks, export_etag, export_fingerprint, export_size, parquet_available, parse_range
+from fast_json import FastJSONResponse, dumps, model_projection
+from intents import ReloadingIntentMatcher
+from http_cache import HTTPCacheMiddleware
+from indexes import ensure_indexes, index_drift, queries_missing_index
+from timeseries import DEFAULT_SPANS, GRANULARITIES, MAX_BUCKETS, TimeseriesRollups
+from write_behind import WriteBehindQueue
+from metrics import MetricsMiddleware, MetricsRegistry, MongoCommandListener, SlowRequestLog
+from rate_limit import MemoryBucketStore, MongoBucketStore, RateLimiter, client_ip, parse_policy
+from pagination import DEFAULT_PAGE_SIZE, KEYSET_SORT, MAX_PAGE_SIZE, fetch_page, stream_ndjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Request, error and Mongo command metrics exposed at /api/metrics
+metrics_registry = MetricsRegistry()
+metrics_registry.describe("http_request_duration_seconds", "histogram", "HTTP request latency by method and route")
+metrics_registry.describe("http_requests_total", "counter", "HTTP requests by method, route and status")
+metrics_registry.describe("http_request_errors_total", "counter", "HTTP requests that returned a 5xx status")
+metrics_registry.describe("http_requests_in_flight", "gauge", "HTTP requests currently being served")
+metrics_registry.describe("mongodb_command_duration_seconds", "histogram", "MongoDB command latency by command and collection")
+metrics_registry.describe("mongodb_command_failures_total", "counter", "MongoDB commands that failed")
+metrics_registry.describe("write_behind_queued_documents", "gauge", "Documents waiting in a write-behind queue")
+metrics_registry.describe("rate_limited_requests_total", "counter", "Requests rejected with 429 by rate limit policy")
+metrics_registry.gauge_set("http_requests_in_flight")
+slow_requests = SlowRequestLog(
+    size=int(os.environ.get('METRICS_SLOW_REQUESTS', '20')),
+    sample_rate=float(os.environ.get('METRICS_PROFILE_SAMPLE_RATE', '0'))
+)
+
+# MongoDB connection. Each worker process opens its own pool, so with N
+# workers the server sees up to N * MONGO_MAX_POOL_SIZE connections.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_CLIENT_OPTIONS = {
+    option: int(os.environ[variable])
+    for option, variable in (
+        ("maxPoolSize", "MONGO_MAX_POOL_SIZE"),
+        ("minPoolSize", "MONGO_MIN_POOL_SIZE"),
+        ("maxIdleTimeMS", "MONGO_MAX_IDLE_TIME_MS"),
+        ("waitQueueTimeoutMS", "MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+        ("serverSelectionTimeoutMS", "MONGO_SERVER_SELECTION_TIMEOUT_MS"),
+        ("connectTimeoutMS", "MONGO_CONNECT_TIMEOUT_MS"),
+        ("socketTimeoutMS", "MONGO_SOCKET_TIMEOUT_MS"),
+    )
+    if variable in os.environ
+}
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandListener(metrics_registry)], **MONGO_CLIENT_OPTIONS)
 db = client[os.environ['DB_NAME']]
 
-# Create the main app without a prefix
-app = FastAPI(
-    title="OpsVantage Digital API",
-    description="Backend API for OpsVantage Digital - Premier AI-first digital agency",
-    version="1.0.0"
+# Incrementally maintained document tallies backing /api/analytics/overview
+counters = Counters(db, {
+    "contact_forms": "status",
+    "newsletter_subscriptions": "status",
+    "service_inquiries": "status",
+    "chat_messages": None
+})
+
+# Per-bucket submission counts for /api/analytics/timeseries
+timeseries = TimeseriesRollups(db, {
+    "contact_forms": {"collection": "contact_forms"},
+    "service_inquiries": {"collection": "service_inquiries", "breakdown": "service_id"},
+    "chat_messages": {"collection": "chat_messages", "breakdown": "session_id", "distinct_only": True}
+}, grace=timedelta(seconds=float(os.environ.get('ANALYTICS_ROLLUP_GRACE_SECONDS', '60'))))
+
+# Background batch writers for high-volume, fire-and-forget inserts
+chat_writer = WriteBehindQueue(
+    db.chat_messages,
+    on_written=lambda n: counters.record("chat_messages", n=n),
+    max_batch=int(os.environ.get('WRITE_BEHIND_BATCH', '100')),
+    flush_interval=float(os.environ.get('WRITE_BEHIND_INTERVAL', '0.5')),
+    max_queue=int(os.environ.get('WRITE_BEHIND_MAX_QUEUE', '10000')),
+    max_retries=int(os.environ.get('WRITE_BEHIND_RETRIES', '5'))
+)
+status_writer = WriteBehindQueue(
+    db.status_checks,
+    max_batch=int(os.environ.get('WRITE_BEHIND_BATCH', '100')),
+    flush_interval=float(os.environ.get('WRITE_BEHIND_INTERVAL', '0.5')),
+    max_queue=int(os.environ.get('WRITE_BEHIND_MAX_QUEUE', '10000')),
+    max_retries=int(os.environ.get('WRITE_BEHIND_RETRIES', '5'))
+)
+
+# Chatbot keyword intents, reloaded when the table file changes
+chat_intents = ReloadingIntentMatcher(
+    Path(os.environ.get('CHAT_INTENTS_FILE', ROOT_DIR / 'intents.json')),
+    check_interval=float(os.environ.get('CHAT_INTENTS_RELOAD_INTERVAL', '5'))
 )
 
+# Recent turns of active chat sessions, giving the responder context without a read per message
+chat_sessions = SessionWindows(
+    max_sessions=int(os.environ.get('CHAT_SESSION_CACHE_SIZE', '10000')),
+    turns=int(os.environ.get('CHAT_CONTEXT_TURNS', '10'))
+)
+# Chat messages older than this are removed by a TTL index
+CHAT_RETENTION_DAYS = int(os.environ.get('CHAT_RETENTION_DAYS', '90'))
+
+# Response compression: brotli or gzip, for text-like bodies of at least COMPRESSION_MIN_SIZE bytes
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '1'))
+
+# Cache-Control per route for the idempotent public GETs; these also get ETags and 304s
+# unless listed in HTTP_CACHE_WITHOUT_ETAG
+_STORE_CACHE_CONTROL = f"public, max-age={os.environ.get('CACHE_MAX_AGE_STORE', '60')}"
+HTTP_CACHE_POLICIES: Dict[str, str] = {
+    "/api/": f"public, max-age={os.environ.get('CACHE_MAX_AGE_ROOT', '300')}",
+    "/api/store/products": _STORE_CACHE_CONTROL,
+    "/api/store/products/facets": _STORE_CACHE_CONTROL,
+    "/api/store/products/{product_id}": _STORE_CACHE_CONTROL,
+    "/api/analytics/overview": f"private, max-age={os.environ.get('CACHE_MAX_AGE_ANALYTICS', '10')}",
+}
+# Responses carrying a generated_at timestamp never repeat, so these get Cache-Control only
+HTTP_CACHE_WITHOUT_ETAG = {"/api/analytics/overview"}
+
+# Seconds /api/ready waits for a Mongo ping before reporting the worker unready
+READINESS_TIMEOUT = float(os.environ.get('READINESS_TIMEOUT', '2'))
+# Seconds background workers get on shutdown to finish work already in hand
+SHUTDOWN_DRAIN_TIMEOUT = float(os.environ.get('SHUTDOWN_DRAIN_TIMEOUT', '10'))
+# Set once database setup has succeeded; /api/ready reports 503 until then
+startup_complete = asyncio.Event()
+# Longest wait, in seconds, between attempts at database setup while MongoDB is unreachable
+STARTUP_RETRY_MAX_DELAY = float(os.environ.get('STARTUP_RETRY_MAX_DELAY', '30'))
+
+# Rows validated and written per insert_many by the bulk ingestion endpoints
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', '1000'))
+# Largest upload the bulk ingestion endpoints accept, in rows
+BULK_MAX_ROWS = int(os.environ.get('BULK_MAX_ROWS', '10000'))
+
+# Opt-in fast read path: encode trusted documents straight to JSON with orjson,
+# skipping model construction, response_model validation and jsonable_encoder
+FAST_READS = os.environ.get('FAST_READS', 'false').lower() == 'true'
+
+# Serialized store catalog, served from memory between reloads
+catalog_cache = CatalogCache(
+    ttl=float(os.environ.get('CATALOG_CACHE_TTL', '60')),
+    max_items=int(os.environ.get('CATALOG_CACHE_MAX_ITEMS', '1000'))
+)
+
+# Email notifications for new contact forms and service inquiries, sent from a
+# durable outbox by background workers; disabled unless SMTP_HOST is set. For
+# local testing run a debugging server (python -m aiosmtpd -n -l localhost:1025)
+# and set SMTP_HOST=localhost SMTP_PORT=1025.
+notifications = None
+if os.environ.get('SMTP_HOST'):
+    # Imported only when enabled, keeping smtplib and email out of cold starts that do not need them
+    from notifications import NotificationOutbox, SMTPConnectionPool
+
+    notifications = NotificationOutbox(
+        db,
+        SMTPConnectionPool(
+            os.environ['SMTP_HOST'],
+            port=int(os.environ.get('SMTP_PORT', '25')),
+            username=os.environ.get('SMTP_USERNAME'),
+            password=os.environ.get('SMTP_PASSWORD'),
+            starttls=os.environ.get('SMTP_STARTTLS', 'false').lower() == 'true',
+            size=int(os.environ.get('SMTP_POOL_SIZE', '2'))
+        ),
+        sender=os.environ.get('NOTIFY_FROM', 'noreply@opsvantage.digital'),
+        recipient=os.environ.get('NOTIFY_TO', 'team@opsvantage.digital'),
+        workers=int(os.environ.get('NOTIFY_WORKERS', '2')),
+        max_attempts=int(os.environ.get('NOTIFY_MAX_ATTEMPTS', '5')),
+        backoff=float(os.environ.get('NOTIFY_BACKOFF_SECONDS', '30'))
+    )
+
+# Token-bucket limits on the public write endpoints, as "burst/seconds" per
+# client IP (and per chat session). Buckets live in this process unless
+# RATE_LIMIT_BACKEND=mongo, which shares them between uvicorn workers.
+rate_limiter = RateLimiter(
+    MongoBucketStore(db) if os.environ.get('RATE_LIMIT_BACKEND', 'memory') == 'mongo'
+    else MemoryBucketStore(max_keys=int(os.environ.get('RATE_LIMIT_MAX_KEYS', '10000'))),
+    {
+        "contact": parse_policy(os.environ.get('RATE_LIMIT_CONTACT', '5/60')),
+        "inquiry": parse_policy(os.environ.get('RATE_LIMIT_INQUIRY', '5/60')),
+        "newsletter": parse_policy(os.environ.get('RATE_LIMIT_NEWSLETTER', '5/60')),
+        "chat": parse_policy(os.environ.get('RATE_LIMIT_CHAT', '30/60')),
+        "chat_session": parse_policy(os.environ.get('RATE_LIMIT_CHAT_SESSION', '20/60')),
+        "bulk": parse_policy(os.environ.get('RATE_LIMIT_BULK', '2/60')),
+    },
+    enabled=os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+)
+# Per-IP limits need the visitor's address: run uvicorn with FORWARDED_ALLOW_IPS
+# set to the proxy's address (see serve.py). Requests from a private proxy that
+# is not trusted skip the per-IP limits rather than sharing one bucket.
+# TRUST_FORWARDED_FOR takes the first X-Forwarded-For entry instead; only enable
+# it behind a proxy that overwrites the header, or clients can pick their own key.
+TRUST_FORWARDED_FOR = os.environ.get('TRUST_FORWARDED_FOR', 'false').lower() == 'true'
+
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
@@ -48,6 +230,10 @@ class ContactForm(BaseModel):
     budget: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     status: str = Field(default="new")
+    # Bumped on every status change; PATCH requests must name the version they saw
+    version: int = 0
+    assigned_to: Optional[str] = None
+    updated_at: Optional[datetime] = None
 
 class ContactFormCreate(BaseModel):
     name: str
@@ -65,10 +251,21 @@ class NewsletterSubscription(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     status: str = Field(default="active")
 
+def _normalize_email(email: str) -> str:
+    # Newsletter emails are stored lowercased so the unique index is case-insensitive
+    return email.strip().lower()
+
 class NewsletterSubscriptionCreate(BaseModel):
     email: str
     name: Optional[str] = None
 
+    _normalize_email = field_validator("email")(_normalize_email)
+
+class NewsletterUnsubscribe(BaseModel):
+    email: str
+
+    _normalize_email = field_validator("email")(_normalize_email)
+
 class ServiceInquiry(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     service_id: str
@@ -80,6 +277,9 @@ class ServiceInquiry(BaseModel):
     timeline: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     status: str = Field(default="pending")
+    version: int = 0
+    assigned_to: Optional[str] = None
+    updated_at: Optional[datetime] = None
 
 class ServiceInquiryCreate(BaseModel):
     service_id: str
@@ -90,6 +290,15 @@ class ServiceInquiryCreate(BaseModel):
     budget_range: Optional[str] = None
     timeline: Optional[str] = None
 
+class LeadStatusUpdate(BaseModel):
+    status: str
+    version: int
+    assigned_to: Optional[str] = None
+
+class LeadClaim(BaseModel):
+    assigned_to: str
+    service: Optional[str] = None
+
 class DigitalProduct(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
@@ -111,12 +320,176 @@ class ChatMessage(BaseModel):
     session_id: str
     message: str
     response: str
+    intent: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class ChatMessageCreate(BaseModel):
     session_id: str
     message: str
 
+# Indexes, declared per collection and applied on startup
+def _id_index():
+    return IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+
+def _timeline_index():
+    # Matches the (timestamp, id) keyset order used by the paginated admin lists
+    return IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)], name="timestamp_id")
+
+def _queue_indexes(service_field: str):
+    # Oldest-first work queues, for one status and optionally one service
+    return [
+        IndexModel([("status", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)], name="status_timestamp_id"),
+        IndexModel(
+            [("status", ASCENDING), (service_field, ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)],
+            name=f"status_{service_field}_timestamp_id"
+        ),
+    ]
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "contact_forms": [
+        _id_index(),
+        _timeline_index(),
+        IndexModel([("message", TEXT)], name="search_text"),
+        *_queue_indexes("service"),
+    ],
+    "service_inquiries": [
+        _id_index(),
+        _timeline_index(),
+        IndexModel([("project_details", TEXT)], name="search_text"),
+        *_queue_indexes("service_id"),
+    ],
+    "status_checks": [_id_index(), _timeline_index()],
+    "newsletter_subscriptions": [
+        _id_index(),
+        _timeline_index(),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "digital_products": [
+        _id_index(),
+        IndexModel([("is_active", ASCENDING), ("created_at", DESCENDING)], name="active_created_at"),
+        IndexModel([("is_active", ASCENDING), ("category", ASCENDING), ("created_at", DESCENDING)], name="active_category_created_at"),
+        IndexModel(
+            [("title", TEXT), ("description", TEXT), ("features", TEXT)],
+            name="search_text",
+            weights={"title": 10, "features": 3, "description": 1}
+        ),
+    ],
+    "chat_messages": [
+        _id_index(),
+        # Export order
+        _timeline_index(),
+        # Session history pages, in the shared (timestamp, id) keyset order
+        IndexModel([("session_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)], name="session_timestamp_id"),
+        # Also serves the timestamp range scans of the chat rollups
+        IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl", expireAfterSeconds=CHAT_RETENTION_DAYS * 86400),
+    ],
+    "analytics_rollups": [
+        IndexModel([("metric", ASCENDING), ("granularity", ASCENDING), ("bucket", ASCENDING)], name="metric_granularity_bucket"),
+    ],
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "notification_outbox": [
+        _id_index(),
+        # Serves the workers' claim query: due jobs by status, oldest first
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+    ],
+}
+
+# Representative hot-path queries; each must be answered from an index
+INDEX_QUERY_CHECKS: List[Dict[str, Any]] = [
+    {"collection": "newsletter_subscriptions", "query": {"email": "user@example.com"}},
+    {"collection": "digital_products", "query": {"is_active": True}, "sort": [("created_at", DESCENDING)]},
+    {"collection": "digital_products", "query": {"id": "product-id", "is_active": True}},
+    {"collection": "contact_forms", "query": {}, "sort": [("timestamp", DESCENDING), ("id", DESCENDING)]},
+    {"collection": "service_inquiries", "query": {}, "sort": [("timestamp", DESCENDING), ("id", DESCENDING)]},
+    {"collection": "status_checks", "query": {}, "sort": [("timestamp", DESCENDING), ("id", DESCENDING)]},
+    {"collection": "service_inquiries", "query": {"status": "pending", "service_id": "web-development"}, "sort": [("timestamp", ASCENDING), ("id", ASCENDING)]},
+    {"collection": "contact_forms", "query": {"status": "new"}, "sort": [("timestamp", ASCENDING), ("id", ASCENDING)]},
+    {"collection": "chat_messages", "query": {"session_id": "session-id"}, "sort": [("timestamp", DESCENDING), ("id", DESCENDING)]},
+]
+
+# Collections searchable through /api/search, each with its text index, any
+# base filter, and the query parameters it accepts as equality filters
+SEARCH_TARGETS: Dict[str, Dict[str, Any]] = {
+    "products": {
+        "collection": "digital_products",
+        "model": DigitalProduct,
+        "base_query": {"is_active": True},
+        "filters": {"category": "category"}
+    },
+    "contacts": {
+        "collection": "contact_forms",
+        "model": ContactForm,
+        "base_query": {},
+        "filters": {"status": "status", "service": "service"}
+    },
+    "inquiries": {
+        "collection": "service_inquiries",
+        "model": ServiceInquiry,
+        "base_query": {},
+        "filters": {"status": "status", "service": "service_id"}
+    },
+}
+MAX_SEARCH_PAGE = 50
+
+# Lead status workflows: allowed transitions per status, the status new leads
+# wait in, and the one a claim moves them to
+LEAD_WORKFLOWS: Dict[str, Dict[str, Any]] = {
+    "contact_forms": {
+        "model": ContactForm,
+        "service_field": "service",
+        "queued": "new",
+        "claimed": "in_progress",
+        "transitions": {
+            "new": ["in_progress", "spam"],
+            "in_progress": ["new", "closed"],
+            "closed": ["in_progress"],
+            "spam": ["new"],
+        }
+    },
+    "service_inquiries": {
+        "model": ServiceInquiry,
+        "service_field": "service_id",
+        "queued": "pending",
+        "claimed": "in_progress",
+        "transitions": {
+            "pending": ["in_progress", "declined"],
+            "in_progress": ["pending", "quoted", "declined"],
+            "quoted": ["won", "lost"],
+            "won": [],
+            "lost": ["in_progress"],
+            "declined": ["pending"],
+        }
+    },
+}
+MAX_QUEUE_PAGE = 200
+
+# Collections downloadable through /api/export, with the model giving their columns
+EXPORTS: Dict[str, Any] = {
+    "contact_forms": ContactForm,
+    "service_inquiries": ServiceInquiry,
+    "newsletter_subscriptions": NewsletterSubscription,
+    "chat_messages": ChatMessage,
+}
+# Fields hashed into an export's ETag: the row id plus every field that is
+# updated in place, so a resumed download never splices two versions together
+EXPORT_VALIDATOR_FIELDS: Dict[str, List[str]] = {
+    "contact_forms": ["id", "status", "version", "assigned_to", "updated_at"],
+    "service_inquiries": ["id", "status", "version", "assigned_to", "updated_at"],
+    "newsletter_subscriptions": ["id", "email", "status"],
+    "chat_messages": ["id"],
+}
+# Documents per Motor batch and per Parquet row group when exporting
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', '5000'))
+# Byte size of recently resumed exports by ETag; an ETag fixes the bytes, so
+# later resumes of the same export skip the sizing pass
+export_sizes: "OrderedDict[str, int]" = OrderedDict()
+EXPORT_SIZE_CACHE = 128
+
+# Price band boundaries for the store facets; prices at or above the last one fall in an open band
+PRICE_BANDS = [0, 50, 100, 200, 500]
+
 # Basic Routes
 @api_router.get("/")
 async def root():
@@ -124,10 +497,163 @@ async def root():
 
 @api_router.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.utcnow(),
+        "queued_writes": {
+            "chat_messages": chat_writer.pending,
+            "status_checks": status_writer.pending
+        }
+    }
+
+async def _enforce_rate_limit(policy: str, key: str):
+    try:
+        await rate_limiter.hit(policy, key)
+    except HTTPException:
+        metrics_registry.inc("rate_limited_requests_total", (("policy", policy),))
+        raise
+    except Exception as e:
+        # Fail open: a broken shared bucket store must not take the forms down with it
+        logging.error(f"Rate limit check failed for {policy}: {str(e)}")
+
+async def _notify(template: str, payload: Dict[str, Any]):
+    """Queue a notification email; the submission is already stored, so a failure here is only logged"""
+    if notifications is None:
+        return
+    try:
+        await notifications.enqueue(template, payload)
+    except Exception as e:
+        logging.error(f"Failed to queue {template} notification: {str(e)}")
+
+def _rate_limited(policy: str):
+    """Route dependency applying a rate limit policy per client IP"""
+    async def check(request: Request):
+        await _enforce_rate_limit(policy, client_ip(request, TRUST_FORWARDED_FOR))
+    return Depends(check)
+
+@api_router.get("/ready")
+async def readiness_check():
+    """Report whether this worker can serve traffic: started up and able to reach MongoDB
+
+    Unlike /health, this pings the database, so a load balancer can take a
+    worker out of rotation while Mongo is unreachable.
+    """
+    if not startup_complete.is_set():
+        raise HTTPException(status_code=503, detail="Starting up")
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_TIMEOUT)
+    except Exception as e:
+        logging.error(f"Readiness check failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ready", "pid": os.getpid(), "timestamp": datetime.utcnow()}
+
+def _page_response(response: Response, docs: List[Dict[str, Any]], next_cursor: Optional[str], model):
+    """Return one page of admin list rows, via the fast path when enabled"""
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if FAST_READS:
+        return FastJSONResponse(docs, headers=headers)
+    response.headers.update(headers)
+    return [model(**doc) for doc in docs]
+
+async def _record_inserted(collection: str, docs: List[Dict[str, Any]]):
+    """Count bulk-inserted documents, grouped by status"""
+    statuses: Dict[str, int] = {}
+    for doc in docs:
+        statuses[doc["status"]] = statuses.get(doc["status"], 0) + 1
+    for status, n in statuses.items():
+        await counters.record(collection, status, n)
+
+async def _bulk_ingest(request: Request, collection: str, create_model, model):
+    try:
+        ingest = BulkIngest(
+            db[collection], create_model, model,
+            batch_size=BULK_BATCH_SIZE,
+            on_inserted=lambda docs: _record_inserted(collection, docs),
+            max_rows=BULK_MAX_ROWS
+        )
+        report = await ingest.run(iter_rows(request, BULK_MAX_ROWS))
+        logging.info(f"Bulk import into {collection}: {report['inserted']} of {report['received']} rows inserted")
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error bulk importing into {collection}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to import rows")
+
+def _version_filter(version: int):
+    # Leads stored before versioning have no version field and count as version 0
+    return {"$in": [0, None]} if version == 0 else version
+
+async def _change_status(collection: str, lead_id: str, update: LeadStatusUpdate):
+    """Apply a workflow transition if the lead is still at the version the caller saw"""
+    workflow = LEAD_WORKFLOWS[collection]
+    if update.status not in workflow["transitions"]:
+        raise HTTPException(status_code=400, detail=f"Unknown status '{update.status}'")
+    sources = [status for status, targets in workflow["transitions"].items() if update.status in targets]
+    changes: Dict[str, Any] = {"status": update.status, "updated_at": datetime.utcnow()}
+    if update.assigned_to is not None:
+        changes["assigned_to"] = update.assigned_to
+
+    # One atomic update: matches only if nobody changed the lead since it was read
+    # and its current status may move to the new one
+    before = await db[collection].find_one_and_update(
+        {"id": lead_id, "version": _version_filter(update.version), "status": {"$in": sources}},
+        {"$set": changes, "$inc": {"version": 1}},
+        projection=model_projection(workflow["model"]),
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        current = await db[collection].find_one({"id": lead_id}, {"_id": 0, "status": 1, "version": 1})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        if current.get("version", 0) != update.version:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Modified since version {update.version}; current version is {current.get('version', 0)}"
+            )
+        raise HTTPException(status_code=400, detail=f"Cannot move from '{current['status']}' to '{update.status}'")
+
+    await counters.move(collection, before["status"], update.status)
+    return workflow["model"](**{**before, **changes, "version": before.get("version", 0) + 1})
+
+def _queue_query(collection: str, status: Optional[str], service: Optional[str]) -> Dict[str, Any]:
+    workflow = LEAD_WORKFLOWS[collection]
+    status = status or workflow["queued"]
+    if status not in workflow["transitions"]:
+        raise HTTPException(status_code=400, detail=f"Unknown status '{status}'")
+    query = {"status": status}
+    if service is not None:
+        query[workflow["service_field"]] = service
+    return query
+
+async def _lead_queue(collection: str, status: Optional[str], service: Optional[str], limit: int):
+    """Return the oldest leads in a status, optionally for one service"""
+    model = LEAD_WORKFLOWS[collection]["model"]
+    leads = await db[collection].find(
+        _queue_query(collection, status, service), model_projection(model)
+    ).sort([("timestamp", ASCENDING), ("id", ASCENDING)]).to_list(limit)
+    if FAST_READS:
+        return FastJSONResponse(leads)
+    return [model(**lead) for lead in leads]
+
+async def _claim_lead(collection: str, claim: LeadClaim):
+    """Atomically take the oldest queued lead, so concurrent admins never get the same one"""
+    workflow = LEAD_WORKFLOWS[collection]
+    changes = {"status": workflow["claimed"], "assigned_to": claim.assigned_to, "updated_at": datetime.utcnow()}
+    before = await db[collection].find_one_and_update(
+        _queue_query(collection, None, claim.service),
+        {"$set": changes, "$inc": {"version": 1}},
+        sort=[("timestamp", ASCENDING), ("id", ASCENDING)],
+        projection=model_projection(workflow["model"]),
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        raise HTTPException(status_code=404, detail="Queue is empty")
+    await counters.move(collection, workflow["queued"], workflow["claimed"])
+    return workflow["model"](**{**before, **changes, "version": before.get("version", 0) + 1})
 
 # Contact Form Routes
-@api_router.post("/contact", response_model=ContactForm)
+@api_router.post("/contact", response_model=ContactForm, dependencies=[_rate_limited("contact")])
 async def submit_contact_form(form_data: ContactFormCreate):
     """Submit a contact form inquiry"""
     try:
@@ -136,9 +662,9 @@ async def submit_contact_form(form_data: ContactFormCreate):
         
         # Save to database
         await db.contact_forms.insert_one(contact_obj.dict())
+        await counters.record("contact_forms", contact_obj.status)
+        await _notify("contact_form", contact_obj.dict())
         
-        # Here you would typically send an email notification
-        # For now, we'll just log it
         logging.info(f"New contact form submission from {contact_obj.email}")
         
         return contact_obj
@@ -146,41 +672,149 @@ async def submit_contact_form(form_data: ContactFormCreate):
         logging.error(f"Error submitting contact form: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to submit contact form")
 
+@api_router.post("/contact/bulk", dependencies=[_rate_limited("bulk")])
+async def bulk_submit_contact_forms(request: Request):
+    """Import contact forms from a JSON array or NDJSON body (admin only)"""
+    return await _bulk_ingest(request, "contact_forms", ContactFormCreate, ContactForm)
+
 @api_router.get("/contact", response_model=List[ContactForm])
-async def get_contact_forms():
-    """Get all contact form submissions (admin only)"""
+async def get_contact_forms(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """Get contact form submissions, newest first (admin only)
+
+    Pages are keyed on (timestamp, id); pass the X-Next-Cursor header of one
+    page as `cursor` to fetch the next. `format=ndjson` streams every row instead.
+    """
     try:
-        forms = await db.contact_forms.find().sort("timestamp", -1).to_list(100)
-        return [ContactForm(**form) for form in forms]
+        if format == "ndjson":
+            return StreamingResponse(stream_ndjson(db.contact_forms, {}, cursor, ContactForm, fast=FAST_READS), media_type="application/x-ndjson")
+        forms, next_cursor = await fetch_page(db.contact_forms, {}, cursor, limit, model_projection(ContactForm))
+        return _page_response(response, forms, next_cursor, ContactForm)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error retrieving contact forms: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve contact forms")
 
+@api_router.patch("/contact/{contact_id}", response_model=ContactForm)
+async def update_contact_form_status(contact_id: str, update: LeadStatusUpdate):
+    """Move a contact form to another status (admin only)
+
+    `version` must be the version last read; if the contact form has changed
+    since, the update is refused with 409.
+    """
+    try:
+        return await _change_status("contact_forms", contact_id, update)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error updating contact form: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update contact form")
+
+@api_router.get("/contact/queue", response_model=List[ContactForm])
+async def get_contact_form_queue(
+    status: Optional[str] = None,
+    service: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_QUEUE_PAGE),
+):
+    """Get the oldest contact forms in a status (default "new"), optionally for one service (admin only)"""
+    try:
+        return await _lead_queue("contact_forms", status, service, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error retrieving contact form queue: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve contact form queue")
+
+@api_router.post("/contact/claim", response_model=ContactForm)
+async def claim_contact_form(claim: LeadClaim):
+    """Assign the oldest "new" contact form to an admin and mark it in progress (admin only)"""
+    try:
+        return await _claim_lead("contact_forms", claim)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error claiming contact form: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to claim contact form")
+
 # Newsletter Routes
-@api_router.post("/newsletter/subscribe", response_model=NewsletterSubscription)
+@api_router.post("/newsletter/subscribe", response_model=NewsletterSubscription, dependencies=[_rate_limited("newsletter")])
 async def subscribe_newsletter(subscription_data: NewsletterSubscriptionCreate):
-    """Subscribe to newsletter"""
+    """Subscribe to newsletter
+
+    A single upsert against the unique email index: creates the subscription,
+    reactivates an unsubscribed one, or reports an existing active one.
+    """
     try:
-        # Check if email already exists
-        existing = await db.newsletter_subscriptions.find_one({"email": subscription_data.email})
-        if existing:
-            raise HTTPException(status_code=400, detail="Email already subscribed")
+        subscription_obj = NewsletterSubscription(**subscription_data.dict())
+        new_fields = subscription_obj.dict()
+        del new_fields["status"]
         
-        subscription_dict = subscription_data.dict()
-        subscription_obj = NewsletterSubscription(**subscription_dict)
+        try:
+            previous = await db.newsletter_subscriptions.find_one_and_update(
+                {"email": subscription_obj.email},
+                {"$setOnInsert": new_fields, "$set": {"status": "active"}},
+                projection={"_id": 0},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            # Lost an upsert race with an identical request
+            raise HTTPException(status_code=400, detail="Email already subscribed")
         
-        await db.newsletter_subscriptions.insert_one(subscription_obj.dict())
+        if previous is None:
+            await counters.record("newsletter_subscriptions", "active")
+            logging.info(f"New newsletter subscription: {subscription_obj.email}")
+            return subscription_obj
+        if previous["status"] == "active":
+            raise HTTPException(status_code=400, detail="Email already subscribed")
         
-        logging.info(f"New newsletter subscription: {subscription_obj.email}")
-        return subscription_obj
+        await counters.move("newsletter_subscriptions", previous["status"], "active")
+        logging.info(f"Newsletter subscription reactivated: {subscription_obj.email}")
+        return NewsletterSubscription(**{**previous, "status": "active"})
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Error subscribing to newsletter: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to subscribe to newsletter")
 
+@api_router.post("/newsletter/unsubscribe", response_model=NewsletterSubscription)
+async def unsubscribe_newsletter(unsubscribe_data: NewsletterUnsubscribe):
+    """Unsubscribe from newsletter"""
+    try:
+        previous = await db.newsletter_subscriptions.find_one_and_update(
+            {"email": unsubscribe_data.email, "status": "active"},
+            {"$set": {"status": "unsubscribed"}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not previous:
+            raise HTTPException(status_code=404, detail="Email not subscribed")
+        
+        await counters.move("newsletter_subscriptions", "active", "unsubscribed")
+        logging.info(f"Newsletter unsubscription: {unsubscribe_data.email}")
+        return NewsletterSubscription(**{**previous, "status": "unsubscribed"})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error unsubscribing from newsletter: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to unsubscribe from newsletter")
+
+@api_router.post("/newsletter/bulk", dependencies=[_rate_limited("bulk")])
+async def bulk_subscribe_newsletter(request: Request):
+    """Import newsletter subscribers from a JSON array or NDJSON body (admin only)
+
+    Emails that are already subscribed are rejected by the unique email index
+    and reported as duplicates.
+    """
+    return await _bulk_ingest(request, "newsletter_subscriptions", NewsletterSubscriptionCreate, NewsletterSubscription)
+
 # Service Inquiry Routes
-@api_router.post("/services/inquiry", response_model=ServiceInquiry)
+@api_router.post("/services/inquiry", response_model=ServiceInquiry, dependencies=[_rate_limited("inquiry")])
 async def submit_service_inquiry(inquiry_data: ServiceInquiryCreate):
     """Submit a service inquiry"""
     try:
@@ -188,6 +822,8 @@ async def submit_service_inquiry(inquiry_data: ServiceInquiryCreate):
         inquiry_obj = ServiceInquiry(**inquiry_dict)
         
         await db.service_inquiries.insert_one(inquiry_obj.dict())
+        await counters.record("service_inquiries", inquiry_obj.status)
+        await _notify("service_inquiry", inquiry_obj.dict())
         
         logging.info(f"New service inquiry from {inquiry_obj.client_email} for service {inquiry_obj.service_id}")
         return inquiry_obj
@@ -195,73 +831,252 @@ async def submit_service_inquiry(inquiry_data: ServiceInquiryCreate):
         logging.error(f"Error submitting service inquiry: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to submit service inquiry")
 
+@api_router.post("/services/inquiry/bulk", dependencies=[_rate_limited("bulk")])
+async def bulk_submit_service_inquiries(request: Request):
+    """Import service inquiries from a JSON array or NDJSON body (admin only)"""
+    return await _bulk_ingest(request, "service_inquiries", ServiceInquiryCreate, ServiceInquiry)
+
 @api_router.get("/services/inquiries", response_model=List[ServiceInquiry])
-async def get_service_inquiries():
-    """Get all service inquiries (admin only)"""
+async def get_service_inquiries(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """Get service inquiries, newest first (admin only)"""
     try:
-        inquiries = await db.service_inquiries.find().sort("timestamp", -1).to_list(100)
-        return [ServiceInquiry(**inquiry) for inquiry in inquiries]
+        if format == "ndjson":
+            return StreamingResponse(stream_ndjson(db.service_inquiries, {}, cursor, ServiceInquiry, fast=FAST_READS), media_type="application/x-ndjson")
+        inquiries, next_cursor = await fetch_page(db.service_inquiries, {}, cursor, limit, model_projection(ServiceInquiry))
+        return _page_response(response, inquiries, next_cursor, ServiceInquiry)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error retrieving service inquiries: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve service inquiries")
 
+@api_router.patch("/services/inquiry/{inquiry_id}", response_model=ServiceInquiry)
+async def update_service_inquiry_status(inquiry_id: str, update: LeadStatusUpdate):
+    """Move a service inquiry to another status (admin only)
+
+    `version` must be the version last read; if the service inquiry has changed
+    since, the update is refused with 409.
+    """
+    try:
+        return await _change_status("service_inquiries", inquiry_id, update)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error updating service inquiry: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update service inquiry")
+
+@api_router.get("/services/inquiries/queue", response_model=List[ServiceInquiry])
+async def get_service_inquiry_queue(
+    status: Optional[str] = None,
+    service: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_QUEUE_PAGE),
+):
+    """Get the oldest service inquiries in a status (default "pending"), optionally for one service (admin only)"""
+    try:
+        return await _lead_queue("service_inquiries", status, service, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error retrieving service inquiry queue: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve service inquiry queue")
+
+@api_router.post("/services/inquiries/claim", response_model=ServiceInquiry)
+async def claim_service_inquiry(claim: LeadClaim):
+    """Assign the oldest "pending" service inquiry to an admin and mark it in progress (admin only)"""
+    try:
+        return await _claim_lead("service_inquiries", claim)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error claiming service inquiry: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to claim service inquiry")
+
 # Digital Store Routes
+def _product_json(product: Dict[str, Any]) -> str:
+    if FAST_READS:
+        return dumps(product).decode()
+    return DigitalProduct(**product).json()
+
+async def _load_catalog():
+    products = await db.digital_products.find({"is_active": True}, model_projection(DigitalProduct)).sort("created_at", -1).to_list(100)
+    return [(product["id"], _product_json(product)) for product in products]
+
+async def _load_product(product_id: str):
+    product = await db.digital_products.find_one({"id": product_id, "is_active": True}, model_projection(DigitalProduct))
+    return _product_json(product) if product else None
+
+def _cached_response(cached, if_none_match: Optional[str]) -> Response:
+    body, etag = cached
+    headers = {"ETag": etag}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _product_query(
+    category: Optional[str],
+    product_type: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    bestseller: Optional[bool],
+    subscription: Optional[bool]
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {"is_active": True}
+    if category is not None:
+        query["category"] = category
+    if product_type is not None:
+        query["type"] = product_type
+    if min_price is not None or max_price is not None:
+        query["price"] = {}
+        if min_price is not None:
+            query["price"]["$gte"] = min_price
+        if max_price is not None:
+            query["price"]["$lte"] = max_price
+    if bestseller is not None:
+        query["is_bestseller"] = bestseller
+    if subscription is not None:
+        query["is_subscription"] = subscription
+    return query
+
+def _fields_projection(fields: str) -> Dict[str, int]:
+    """Mongo projection for a comma-separated `fields=` list; `id` is always included"""
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in DigitalProduct.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown product fields: {', '.join(unknown)}")
+    projection = {field: 1 for field in requested}
+    projection.update({"id": 1, "_id": 0})
+    return projection
+
 @api_router.get("/store/products", response_model=List[DigitalProduct])
-async def get_digital_products():
-    """Get all active digital products"""
+async def get_digital_products(
+    if_none_match: Optional[str] = Header(None),
+    category: Optional[str] = None,
+    product_type: Optional[str] = Query(None, alias="type"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    bestseller: Optional[bool] = None,
+    subscription: Optional[bool] = None,
+    fields: Optional[str] = None
+):
+    """Get active digital products
+
+    Without parameters the full catalog is served from the in-process cache.
+    Filters and a sparse `fields=` list are pushed down to Mongo as the query
+    and projection, so only the requested data leaves the database.
+    """
+    query = _product_query(category, product_type, min_price, max_price, bestseller, subscription)
+    projection = _fields_projection(fields) if fields else model_projection(DigitalProduct)
     try:
-        products = await db.digital_products.find({"is_active": True}).sort("created_at", -1).to_list(100)
+        if len(query) == 1 and not fields:
+            return _cached_response(await catalog_cache.get_list(_load_catalog), if_none_match)
+        products = await db.digital_products.find(query, projection).sort("created_at", -1).to_list(100)
+        if fields:
+            # Sparse rows cannot satisfy response_model, and come straight from trusted documents
+            return FastJSONResponse(products)
         return [DigitalProduct(**product) for product in products]
     except Exception as e:
         logging.error(f"Error retrieving digital products: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve products")
 
+@api_router.get("/store/products/facets")
+async def get_digital_product_facets(
+    category: Optional[str] = None,
+    product_type: Optional[str] = Query(None, alias="type"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    bestseller: Optional[bool] = None,
+    subscription: Optional[bool] = None
+):
+    """Count matching products per category and price band in one $facet aggregation"""
+    query = _product_query(category, product_type, min_price, max_price, bestseller, subscription)
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "categories": [
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}}
+            ],
+            "price_bands": [
+                {"$bucket": {
+                    "groupBy": "$price",
+                    "boundaries": PRICE_BANDS,
+                    "default": "other",
+                    "output": {"count": {"$sum": 1}}
+                }}
+            ]
+        }}
+    ]
+    try:
+        result = (await db.digital_products.aggregate(pipeline).to_list(1))[0]
+        price_bands = []
+        for band in result["price_bands"]:
+            if band["_id"] == "other":
+                price_bands.append({"min": PRICE_BANDS[-1], "max": None, "count": band["count"]})
+            else:
+                upper = PRICE_BANDS[PRICE_BANDS.index(band["_id"]) + 1]
+                price_bands.append({"min": band["_id"], "max": upper, "count": band["count"]})
+        return {
+            "total": result["total"][0]["count"] if result["total"] else 0,
+            "categories": [{"category": item["_id"], "count": item["count"]} for item in result["categories"]],
+            "price_bands": price_bands
+        }
+    except Exception as e:
+        logging.error(f"Error retrieving product facets: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve product facets")
+
 @api_router.get("/store/products/{product_id}", response_model=DigitalProduct)
-async def get_digital_product(product_id: str):
+async def get_digital_product(product_id: str, if_none_match: Optional[str] = Header(None)):
     """Get a specific digital product"""
     try:
-        product = await db.digital_products.find_one({"id": product_id, "is_active": True})
-        if not product:
+        cached = await catalog_cache.get_item(product_id, _load_product)
+        if cached is None:
             raise HTTPException(status_code=404, detail="Product not found")
-        return DigitalProduct(**product)
+        return _cached_response(cached, if_none_match)
     except HTTPException:
         raise
     except Exception as e:
         logging.error(f"Error retrieving product {product_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve product")
 
+@api_router.post("/store/cache/invalidate")
+async def invalidate_catalog_cache(product_id: Optional[str] = None):
+    """Drop cached catalog entries after products change (admin only)"""
+    catalog_cache.invalidate(product_id)
+    return {"invalidated": product_id or "all", "cache": catalog_cache.stats()}
+
 # Chat Bot Routes
-@api_router.post("/chat", response_model=Dict[str, Any])
+@api_router.post("/chat", response_model=Dict[str, Any], dependencies=[_rate_limited("chat")])
 async def chat_with_bot(message_data: ChatMessageCreate):
     """Chat with AI assistant"""
+    await _enforce_rate_limit("chat_session", message_data.session_id)
     try:
+        window = chat_sessions.get(message_data.session_id)
+        if window is None:
+            # First message this worker has seen for the session: seed its context once
+            recent = await db.chat_messages.find(
+                {"session_id": message_data.session_id}, {"_id": 0, "intent": 1}
+            ).sort(KEYSET_SORT).to_list(chat_sessions.turns)
+            window = chat_sessions.load(message_data.session_id, (turn.get("intent") for turn in reversed(recent)))
+
         # Simple response logic - in production, this would integrate with AI service
-        user_message = message_data.message.lower()
-        
-        # Predefined responses based on keywords
-        if any(word in user_message for word in ['service', 'services', 'help', 'what']):
-            response = "I can help you learn about our services! We offer AI Integration, Web Development, Mobile Apps, Digital Strategy, Performance Marketing, and Custom Software. Which interests you most?"
-        elif any(word in user_message for word in ['price', 'cost', 'pricing', 'quote']):
-            response = "Our pricing varies based on project scope. We offer packages starting from $1,500 for marketing, $3,000 for web development, and $5,000 for AI integration. Would you like to schedule a consultation for a detailed quote?"
-        elif any(word in user_message for word in ['ai', 'artificial', 'intelligence', 'automation']):
-            response = "We're specialists in AI integration! We can help automate your business processes, implement chatbots, build predictive analytics, and create custom AI solutions. What specific AI needs do you have?"
-        elif any(word in user_message for word in ['web', 'website', 'development']):
-            response = "We build modern, responsive websites using the latest technologies like React, Next.js, and Node.js. Our websites are fast, SEO-optimized, and mobile-friendly. What kind of website are you looking for?"
-        elif any(word in user_message for word in ['contact', 'call', 'meeting', 'consultation']):
-            response = "I'd be happy to connect you with our team! You can call us at +64 21 183 5253, email contact@opsvantagedigital.online, or fill out our contact form. We offer free initial consultations!"
-        elif any(word in user_message for word in ['portfolio', 'work', 'examples', 'projects']):
-            response = "Check out our portfolio page to see our latest projects! We've built AI-powered e-commerce platforms, mobile banking apps, healthcare systems, and more. Each project showcases our technical expertise and results-driven approach."
-        else:
-            response = "Thanks for your message! I'm here to help with any questions about our services, pricing, or how we can help transform your business with AI and modern technology. What would you like to know?"
+        intent, response = chat_intents.reply(message_data.message, reversed(window))
         
         # Save chat message
         chat_obj = ChatMessage(
             session_id=message_data.session_id,
             message=message_data.message,
-            response=response
+            response=response,
+            intent=intent
         )
         
-        await db.chat_messages.insert_one(chat_obj.dict())
+        await chat_writer.put(chat_obj.dict())
+        chat_sessions.append(message_data.session_id, intent)
         
         return {
             "response": response,
@@ -272,51 +1087,304 @@ async def chat_with_bot(message_data: ChatMessageCreate):
         logging.error(f"Error processing chat message: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to process message")
 
+@api_router.get("/chat/{session_id}/history", response_model=List[ChatMessage])
+async def get_chat_history(
+    session_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Get the messages of one chat session, newest first
+
+    Pass the X-Next-Cursor header of one page as `cursor` to fetch older
+    messages. Messages are written in batches, so the latest turn can take
+    up to WRITE_BEHIND_INTERVAL to appear.
+    """
+    try:
+        messages, next_cursor = await fetch_page(
+            db.chat_messages, {"session_id": session_id}, cursor, limit, model_projection(ChatMessage)
+        )
+        return _page_response(response, messages, next_cursor, ChatMessage)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error retrieving chat history: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve chat history")
+
+# Search Routes
+@api_router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    scope: str = Query("products", pattern="^(products|contacts|inquiries)$"),
+    status: Optional[str] = None,
+    service: Optional[str] = None,
+    category: Optional[str] = None,
+    page: int = Query(1, ge=1, le=MAX_SEARCH_PAGE),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Full-text search over products, or contacts and inquiries (admin only)
+
+    Results are ranked by text relevance from the collection's text index and
+    can be narrowed with equality filters on status, service and category.
+    """
+    target = SEARCH_TARGETS[scope]
+    requested = {"status": status, "service": service, "category": category}
+    query = {**target["base_query"], "$text": {"$search": q}}
+    for param, value in requested.items():
+        if value is None:
+            continue
+        if param not in target["filters"]:
+            raise HTTPException(status_code=400, detail=f"Filter '{param}' is not supported when searching {scope}")
+        query[target["filters"][param]] = value
+    try:
+        projection = {**model_projection(target["model"]), "score": {"$meta": "textScore"}}
+        cursor = db[target["collection"]].find(query, projection)
+        cursor = cursor.sort([("score", {"$meta": "textScore"})]).skip((page - 1) * limit).limit(limit + 1)
+        results = await cursor.to_list(limit + 1)
+        return {
+            "query": q,
+            "scope": scope,
+            "page": page,
+            "limit": limit,
+            "has_more": len(results) > limit,
+            "results": results[:limit]
+        }
+    except Exception as e:
+        logging.error(f"Error searching {scope} for '{q}': {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to search")
+
 # Analytics Routes
 @api_router.get("/analytics/overview")
-async def get_analytics_overview():
-    """Get basic analytics overview (admin only)"""
+async def get_analytics_overview(source: str = Query("counters", pattern="^(counters|exact|estimated)$")):
+    """Get basic analytics overview (admin only)
+
+    `source=counters` reads the maintained tallies, `exact` counts every
+    collection and `estimated` uses collection metadata for the totals.
+    """
     try:
-        contact_forms_count = await db.contact_forms.count_documents({})
-        newsletter_subs_count = await db.newsletter_subscriptions.count_documents({"status": "active"})
-        service_inquiries_count = await db.service_inquiries.count_documents({})
-        chat_messages_count = await db.chat_messages.count_documents({})
+        if source == "counters":
+            tallies = await counters.read()
+            if len(tallies) < len(counters.tracked):
+                tallies.update({
+                    name: await counters.exact(name)
+                    for name in counters.tracked if name not in tallies
+                })
+            contact_forms_count = tallies["contact_forms"]["total"]
+            newsletter_subs_count = tallies["newsletter_subscriptions"].get("by_status", {}).get("active", 0)
+            service_inquiries_count = tallies["service_inquiries"]["total"]
+            chat_messages_count = tallies["chat_messages"]["total"]
+        elif source == "estimated":
+            # Active subscribers need a filter, which estimates cannot apply
+            contact_forms_count, newsletter_subs_count, service_inquiries_count, chat_messages_count = await asyncio.gather(
+                db.contact_forms.estimated_document_count(),
+                db.newsletter_subscriptions.count_documents({"status": "active"}),
+                db.service_inquiries.estimated_document_count(),
+                db.chat_messages.estimated_document_count()
+            )
+        else:
+            contact_forms_count, newsletter_subs_count, service_inquiries_count, chat_messages_count = await asyncio.gather(
+                db.contact_forms.count_documents({}),
+                db.newsletter_subscriptions.count_documents({"status": "active"}),
+                db.service_inquiries.count_documents({}),
+                db.chat_messages.count_documents({})
+            )
         
         return {
             "contact_forms": contact_forms_count,
             "newsletter_subscribers": newsletter_subs_count,
             "service_inquiries": service_inquiries_count,
             "chat_interactions": chat_messages_count,
+            "source": source,
             "generated_at": datetime.utcnow()
         }
     except Exception as e:
         logging.error(f"Error retrieving analytics: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve analytics")
 
+def _as_utc(moment: datetime) -> datetime:
+    # Stored timestamps are naive UTC; normalize aware query values to match
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+@api_router.get("/export/{collection}")
+async def export_collection(
+    collection: str,
+    format: str = Query("csv", pattern="^(csv|parquet)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+):
+    """Download a collection as CSV or Parquet, oldest first, optionally within [start, end) (admin only)
+
+    Rows are streamed from the cursor, so memory use does not grow with the
+    collection. Interrupted downloads can be resumed with a byte Range (and
+    If-Range set to the ETag); pass an explicit `end` so the resumed export
+    covers the same rows. The ETag changes when any row in range is added,
+    removed or updated, and a stale If-Range gets the full export instead.
+
+    Every download first reads the validator fields of the whole range to
+    compute the ETag. The first resume of an export also renders it once to
+    learn its total size before streaming the range, so its first byte
+    arrives only after a full pass; the size is then remembered per ETag.
+    """
+    model = EXPORTS.get(collection)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    try:
+        end = _as_utc(end) if end else datetime.utcnow()
+        query: Dict[str, Any] = {"timestamp": {"$lt": end}}
+        if start:
+            query["timestamp"]["$gte"] = _as_utc(start)
+        fields = EXPORT_VALIDATOR_FIELDS[collection]
+        fingerprint = await export_fingerprint(
+            db[collection].find(query, {**{field: 1 for field in fields}, "_id": 0}).sort(EXPORT_SORT).batch_size(EXPORT_BATCH_ROWS),
+            fields
+        )
+        etag = export_etag(collection, format, query, fingerprint)
+
+        def open_cursor():
+            return db[collection].find(query, model_projection(model)).sort(EXPORT_SORT).batch_size(EXPORT_BATCH_ROWS)
+
+        def chunks():
+            return export_chunks(open_cursor, model, format, EXPORT_BATCH_ROWS)
+
+        filename = f"{collection}-{end.strftime('%Y%m%dT%H%M%S')}.{format}"
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-End": end.isoformat()
+        }
+        requested = parse_range(range_header)
+        if requested is None or (if_range is not None and if_range != etag):
+            return StreamingResponse(chunks(), media_type=MEDIA_TYPES[format], headers=headers)
+
+        # Resuming: the total size comes from one rendering pass unless already known
+        size = export_sizes.get(etag)
+        if size is None:
+            size = await export_size(chunks())
+            export_sizes[etag] = size
+            if len(export_sizes) > EXPORT_SIZE_CACHE:
+                export_sizes.popitem(last=False)
+        else:
+            export_sizes.move_to_end(etag)
+        first, last = requested
+        if first >= size:
+            raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+        last = min(last if last is not None else size - 1, size - 1)
+        headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+        headers["Content-Length"] = str(last - first + 1)
+        return StreamingResponse(byte_slice(chunks(), first, last), status_code=206, media_type=MEDIA_TYPES[format], headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error exporting {collection}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to export")
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose request, error and MongoDB metrics in Prometheus text format"""
+    metrics_registry.gauge_set("write_behind_queued_documents", (("collection", "chat_messages"),), chat_writer.pending)
+    metrics_registry.gauge_set("write_behind_queued_documents", (("collection", "status_checks"),), status_writer.pending)
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/metrics/slow")
+async def get_slow_requests():
+    """List the slowest requests seen, with profiles of sampled ones (admin only)"""
+    return {"requests": slow_requests.slowest(), "generated_at": datetime.utcnow()}
+
+@api_router.get("/notifications/outbox")
+async def get_notification_outbox():
+    """Show outbox counts by status and the most recent dead-lettered notifications (admin only)"""
+    if notifications is None:
+        return {"enabled": False, "counts": {}, "dead": []}
+    try:
+        dead = await db.notification_outbox.find(
+            {"status": "dead"}, {"_id": 0, "payload": 0}
+        ).sort("dead_at", DESCENDING).to_list(20)
+        return {"enabled": True, "counts": await notifications.counts(), "dead": dead}
+    except Exception as e:
+        logging.error(f"Error fetching notification outbox: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch notification outbox")
+
+@api_router.post("/notifications/requeue")
+async def requeue_dead_notifications():
+    """Retry every dead-lettered notification from scratch (admin only)"""
+    if notifications is None:
+        raise HTTPException(status_code=404, detail="Notifications are not enabled")
+    try:
+        return {"requeued": await notifications.requeue_dead()}
+    except Exception as e:
+        logging.error(f"Error requeueing notifications: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to requeue notifications")
+
+@api_router.get("/analytics/timeseries")
+async def get_analytics_timeseries(
+    metric: str = Query("contact_forms", pattern="^(contact_forms|service_inquiries|chat_messages)$"),
+    granularity: str = Query("day", pattern="^(hour|day|week)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Get submission counts per hour, day or week (admin only)
+
+    Inquiries are broken down by service_id and chat volume reports the number
+    of distinct sessions per bucket.
+    """
+    end = _as_utc(end) if end else datetime.utcnow()
+    start = _as_utc(start) if start else end - DEFAULT_SPANS[granularity]
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / GRANULARITIES[granularity] > MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range spans more than {MAX_BUCKETS} buckets")
+    try:
+        return {
+            "metric": metric,
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "buckets": await timeseries.series(metric, granularity, start, end),
+            "generated_at": datetime.utcnow()
+        }
+    except Exception as e:
+        logging.error(f"Error retrieving analytics timeseries: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve analytics timeseries")
+
+@api_router.get("/analytics/indexes")
+async def get_index_report():
+    """Report index drift and hot queries that are not served by an index (admin only)"""
+    try:
+        return {
+            "drift": await index_drift(db, INDEXES),
+            "unindexed_queries": await queries_missing_index(db, INDEX_QUERY_CHECKS),
+            "generated_at": datetime.utcnow()
+        }
+    except Exception as e:
+        logging.error(f"Error retrieving index report: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve index report")
+
 # Legacy status check routes (keeping for compatibility)
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    await status_writer.put(status_obj.dict())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
-
-# Include the router in the main app
-app.include_router(api_router)
-
-# CORS Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+async def get_status_checks(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    if format == "ndjson":
+        return StreamingResponse(stream_ndjson(db.status_checks, {}, cursor, StatusCheck, fast=FAST_READS), media_type="application/x-ndjson")
+    status_checks, next_cursor = await fetch_page(db.status_checks, {}, cursor, limit, model_projection(StatusCheck))
+    return _page_response(response, status_checks, next_cursor, StatusCheck)
 
 # Configure logging
 logging.basicConfig(
@@ -325,88 +1393,218 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
+# Sample catalog seeded into an empty store on startup. Ids are derived from a
+# fixed slug rather than random, so seeding is an idempotent upsert per product.
+def _sample_product_id(slug: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"https://opsvantage.digital/store/{slug}"))
+
+SAMPLE_PRODUCTS = [
+    {
+        "id": _sample_product_id("ai-business-transformation-guide"),
+        "title": "AI Business Transformation Guide",
+        "description": "Complete guide to implementing AI in your business operations",
+        "type": "E-book",
+        "price": 49.99,
+        "original_price": 79.99,
+        "features": ["150+ pages", "Case studies", "Implementation templates", "Video tutorials"],
+        "image_url": "https://images.unsplash.com/photo-1677442136019-21780ecad995",
+        "rating": 4.9,
+        "is_bestseller": True,
+        "is_subscription": False,
+        "category": "AI",
+        "is_active": True
+    },
+    {
+        "id": _sample_product_id("complete-web-development-masterclass"),
+        "title": "Complete Web Development Masterclass",
+        "description": "Master modern web development with React, Node.js, and more",
+        "type": "Course",
+        "price": 199.99,
+        "original_price": 299.99,
+        "features": ["40+ hours content", "Hands-on projects", "Lifetime access", "Certificate"],
+        "image_url": "https://images.unsplash.com/photo-1654618977232-a6c6dea9d1e8",
+        "rating": 4.8,
+        "is_bestseller": False,
+        "is_subscription": False,
+        "category": "Web Development",
+        "is_active": True
+    },
+    {
+        "id": _sample_product_id("digital-marketing-automation-toolkit"),
+        "title": "Digital Marketing Automation Toolkit",
+        "description": "Automate your marketing with proven templates and strategies",
+        "type": "Course + Templates",
+        "price": 149.99,
+        "original_price": 199.99,
+        "features": ["50+ templates", "Automation workflows", "Analytics dashboards", "Support"],
+        "image_url": "https://images.unsplash.com/photo-1666698809123-44e998e93f23",
+        "rating": 4.7,
+        "is_bestseller": False,
+        "is_subscription": False,
+        "category": "Marketing",
+        "is_active": True
+    },
+    {
+        "id": _sample_product_id("premium-agency-subscription"),
+        "title": "Premium Agency Subscription",
+        "description": "Monthly access to all courses, templates, and exclusive content",
+        "type": "Subscription",
+        "price": 97.00,
+        "features": ["All courses included", "Monthly new content", "Live Q&A sessions", "Priority support"],
+        "image_url": "https://images.unsplash.com/photo-1519389950473-47ba0277781c",
+        "rating": 4.9,
+        "is_bestseller": False,
+        "is_subscription": True,
+        "category": "Subscription",
+        "is_active": True
+    }
+]
+
+async def _seed_sample_products() -> int:
+    """Upsert each sample product by id and return how many this call created"""
+    created = 0
+    for product in SAMPLE_PRODUCTS:
+        try:
+            result = await db.digital_products.update_one(
+                {"id": product["id"]},
+                {"$setOnInsert": {**product, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+            created += result.upserted_id is not None
+        except DuplicateKeyError:
+            # Another worker inserted the same product between our match and insert
+            pass
+    return created
+
+async def _lowercase_newsletter_emails() -> int:
+    """Lowercase subscriber emails stored before emails were normalized; return how many changed
+
+    Runs before the unique email index is built, and on a legacy database that
+    index may not exist yet, so rows that collide once lowercased are merged
+    here rather than left to the index: a row already stored lowercase (a
+    re-subscription since normalization) is the current one, otherwise the
+    newest; the others are removed.
+    """
+    legacy = set()
+    async for doc in db.newsletter_subscriptions.find({"email": {"$regex": "[A-Z]"}}, {"_id": 0, "email": 1}):
+        legacy.add(_normalize_email(doc["email"]))
+
+    changed = 0
+    for email in legacy:
+        rows = await db.newsletter_subscriptions.find(
+            {"email": {"$regex": rf"^\s*{re.escape(email)}\s*$", "$options": "i"}},
+            {"_id": 1, "email": 1, "status": 1, "timestamp": 1}
+        ).to_list(None)
+        if not rows:
+            continue
+        keep = max(rows, key=lambda row: (row["email"] == email, row.get("timestamp") or datetime.min))
+        for row in rows:
+            if row is keep:
+                continue
+            await db.newsletter_subscriptions.delete_one({"_id": row["_id"]})
+            await counters.record("newsletter_subscriptions", row.get("status"), n=-1)
+            changed += 1
+        if keep["email"] != email:
+            await db.newsletter_subscriptions.update_one({"_id": keep["_id"]}, {"$set": {"email": email}})
+            changed += 1
+    return changed
+
+async def _initialize_database():
+    """Create indexes and seed sample data in the background, then mark the worker ready
+
+    Retried with backoff until it succeeds, so a worker that started while
+    MongoDB was unreachable only reports ready once its setup has run.
+    """
+    delay = 1.0
+    while True:
+        try:
+            if await _lowercase_newsletter_emails():
+                logger.info("Lowercased legacy newsletter subscriber emails")
+            await ensure_indexes(db, INDEXES)
+
+            # Seed the sample catalog into an empty store. Sample products have
+            # stable ids, so workers starting together converge on one copy.
+            if await db.digital_products.count_documents({}) == 0:
+                if await _seed_sample_products():
+                    catalog_cache.invalidate()
+                    logger.info("Sample digital products created")
+
+            logger.info("OpsVantage Digital API started successfully")
+            break
+        except Exception as e:
+            logger.error(f"Error during startup, retrying in {delay:.0f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+    startup_complete.set()
+
+# Background startup work, kept referenced so it is not garbage collected mid-run
+startup_tasks: List[asyncio.Task] = []
+
 async def startup_event():
-    """Initialize database with sample data if needed"""
-    try:
-        # Check if digital products exist, if not, create sample products
-        products_count = await db.digital_products.count_documents({})
-        if products_count == 0:
-            sample_products = [
-                {
-                    "id": str(uuid.uuid4()),
-                    "title": "AI Business Transformation Guide",
-                    "description": "Complete guide to implementing AI in your business operations",
-                    "type": "E-book",
-                    "price": 49.99,
-                    "original_price": 79.99,
-                    "features": ["150+ pages", "Case studies", "Implementation templates", "Video tutorials"],
-                    "image_url": "https://images.unsplash.com/photo-1677442136019-21780ecad995",
-                    "rating": 4.9,
-                    "is_bestseller": True,
-                    "is_subscription": False,
-                    "category": "AI",
-                    "created_at": datetime.utcnow(),
-                    "is_active": True
-                },
-                {
-                    "id": str(uuid.uuid4()),
-                    "title": "Complete Web Development Masterclass",
-                    "description": "Master modern web development with React, Node.js, and more",
-                    "type": "Course",
-                    "price": 199.99,
-                    "original_price": 299.99,
-                    "features": ["40+ hours content", "Hands-on projects", "Lifetime access", "Certificate"],
-                    "image_url": "https://images.unsplash.com/photo-1654618977232-a6c6dea9d1e8",
-                    "rating": 4.8,
-                    "is_bestseller": False,
-                    "is_subscription": False,
-                    "category": "Web Development",
-                    "created_at": datetime.utcnow(),
-                    "is_active": True
-                },
-                {
-                    "id": str(uuid.uuid4()),
-                    "title": "Digital Marketing Automation Toolkit",
-                    "description": "Automate your marketing with proven templates and strategies",
-                    "type": "Course + Templates",
-                    "price": 149.99,
-                    "original_price": 199.99,
-                    "features": ["50+ templates", "Automation workflows", "Analytics dashboards", "Support"],
-                    "image_url": "https://images.unsplash.com/photo-1666698809123-44e998e93f23",
-                    "rating": 4.7,
-                    "is_bestseller": False,
-                    "is_subscription": False,
-                    "category": "Marketing",
-                    "created_at": datetime.utcnow(),
-                    "is_active": True
-                },
-                {
-                    "id": str(uuid.uuid4()),
-                    "title": "Premium Agency Subscription",
-                    "description": "Monthly access to all courses, templates, and exclusive content",
-                    "type": "Subscription",
-                    "price": 97.00,
-                    "features": ["All courses included", "Monthly new content", "Live Q&A sessions", "Priority support"],
-                    "image_url": "https://images.unsplash.com/photo-1519389950473-47ba0277781c",
-                    "rating": 4.9,
-                    "is_bestseller": False,
-                    "is_subscription": True,
-                    "category": "Subscription",
-                    "created_at": datetime.utcnow(),
-                    "is_active": True
-                }
-            ]
-            
-            await db.digital_products.insert_many(sample_products)
-            logger.info("Sample digital products created")
-        
-        logger.info("OpsVantage Digital API started successfully")
-        
-    except Exception as e:
-        logger.error(f"Error during startup: {str(e)}")
+    """Start background workers and initialize the database without blocking startup
+
+    Requests are served as soon as this returns; index creation and seeding
+    finish in the background and /api/ready reports 503 until they have.
+    """
+    chat_writer.start()
+    status_writer.start()
+    counters.start(float(os.environ.get('COUNTERS_RECONCILE_INTERVAL', '300')))
+    if notifications is not None:
+        notifications.start()
+    startup_tasks.append(asyncio.create_task(_initialize_database()))
 
-@app.on_event("shutdown")
 async def shutdown_db_client():
+    # Runs after the server has stopped accepting connections and in-flight
+    # requests have finished (or hit uvicorn's graceful shutdown timeout)
+    startup_complete.clear()
+    for task in startup_tasks:
+        task.cancel()
+    await asyncio.gather(*startup_tasks, return_exceptions=True)
+    startup_tasks.clear()
+    await counters.stop()
+    if notifications is not None:
+        await notifications.stop(SHUTDOWN_DRAIN_TIMEOUT)
+    await chat_writer.drain(SHUTDOWN_DRAIN_TIMEOUT)
+    await status_writer.drain(SHUTDOWN_DRAIN_TIMEOUT)
     client.close()
-    logger.info("Database connection closed")
\ No newline at end of file
+    logger.info("Database connection closed")
+
+def create_app() -> FastAPI:
+    """Build the ASGI app; also usable as `uvicorn server:create_app --factory`"""
+    application = FastAPI(
+        title="OpsVantage Digital API",
+        description="Backend API for OpsVantage Digital - Premier AI-first digital agency",
+        version="1.0.0"
+    )
+
+    # Include the router in the main app
+    application.include_router(api_router)
+
+    # Middleware added later wraps earlier: ETags are computed on the
+    # uncompressed body, and metrics time the compression too
+    application.add_middleware(HTTPCacheMiddleware, policies=HTTP_CACHE_POLICIES, without_etag=HTTP_CACHE_WITHOUT_ETAG)
+    if COMPRESSION_ENABLED:
+        application.add_middleware(
+            CompressionMiddleware,
+            minimum_size=COMPRESSION_MIN_SIZE,
+            gzip_level=COMPRESSION_GZIP_LEVEL,
+            brotli_quality=COMPRESSION_BROTLI_QUALITY
+        )
+
+    # Metrics Middleware
+    application.add_middleware(MetricsMiddleware, registry=metrics_registry, slow_requests=slow_requests)
+
+    # CORS Middleware
+    application.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    application.add_event_handler("startup", startup_event)
+    application.add_event_handler("shutdown", shutdown_db_client)
+    return application
+
+app = create_app()
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from pymongo import ReplaceOne
+
+GRANULARITIES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+# Range returned when the caller does not give a start, per granularity
+DEFAULT_SPANS = {
+    "hour": timedelta(hours=48),
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=26),
+}
+
+MAX_BUCKETS = 1000
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Truncate a UTC timestamp to the start of its bucket (weeks start on Monday)"""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    return day - timedelta(days=day.weekday())
+
+
+def bucket_range(start: datetime, end: datetime, granularity: str) -> List[datetime]:
+    """Every bucket start from the bucket holding `start` up to the one holding `end`"""
+    step = GRANULARITIES[granularity]
+    current = bucket_start(start, granularity)
+    buckets = []
+    while current <= end:
+        buckets.append(current)
+        current += step
+    return buckets
+
+
+class TimeseriesRollups:
+    """Per-bucket submission counts with closed buckets materialized in Mongo
+
+    Each metric names a source collection and an optional breakdown field.
+    Counts come from a `$group` over the indexed `timestamp` field. A bucket
+    that closed more than `grace` ago can no longer change, so it is written
+    to the rollup collection together with the covered time range. The grace
+    period leaves room for rows that are stored after their timestamp (the
+    write-behind queue delays chat messages). Later requests only aggregate the
+    raw data outside the covered range, which is normally just the open
+    bucket and any bucket still within its grace period.
+    """
+
+    def __init__(self, db, metrics: Dict[str, Dict[str, Any]], collection_name: str = "analytics_rollups",
+                 grace: timedelta = timedelta(minutes=1)):
+        self.db = db
+        self.metrics = metrics
+        self.collection_name = collection_name
+        self.grace = grace
+
+    @property
+    def rollups(self):
+        return self.db[self.collection_name]
+
+    async def aggregate(self, metric: str, granularity: str, start: datetime, end: datetime) -> Dict[datetime, Dict[str, Any]]:
+        """Count raw documents per bucket for timestamps in [start, end)"""
+        config = self.metrics[metric]
+        breakdown = config.get("breakdown")
+        truncate = {"$dateTrunc": {"date": "$timestamp", "unit": granularity, "startOfWeek": "monday"}}
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": start, "$lt": end}}},
+            {"$group": {"_id": {"bucket": truncate, "key": f"${breakdown}" if breakdown else None}, "count": {"$sum": 1}}},
+            {"$group": {
+                "_id": "$_id.bucket",
+                "count": {"$sum": "$count"},
+                "keys": {"$push": {"key": "$_id.key", "count": "$count"}}
+            }},
+        ]
+        buckets = {}
+        async for group in self.db[config["collection"]].aggregate(pipeline):
+            row = {"count": group["count"]}
+            if breakdown:
+                if config.get("distinct_only"):
+                    row[f"distinct_{breakdown}"] = len(group["keys"])
+                else:
+                    row[f"by_{breakdown}"] = {str(item["key"]): item["count"] for item in group["keys"]}
+            buckets[group["_id"]] = row
+        return buckets
+
+    async def _materialize(self, metric: str, granularity: str, start: datetime, end: datetime) -> None:
+        """Aggregate closed buckets in [start, end) and store them as rollups"""
+        if start >= end:
+            return
+        buckets = await self.aggregate(metric, granularity, start, end)
+        if buckets:
+            # One round trip for the whole range rather than one per bucket
+            await self.rollups.bulk_write([
+                ReplaceOne(
+                    {"_id": f"{metric}:{granularity}:{bucket.isoformat()}"},
+                    {"metric": metric, "granularity": granularity, "bucket": bucket, **row},
+                    upsert=True
+                )
+                for bucket, row in buckets.items()
+            ], ordered=False)
+
+    async def series(self, metric: str, granularity: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Return one row per bucket between start and end, zero-filled"""
+        now = datetime.utcnow()
+        step = GRANULARITIES[granularity]
+        open_bucket = bucket_start(now, granularity)
+        # Buckets before this one closed at least `grace` ago and are final
+        settled = bucket_start(now - self.grace, granularity)
+        first_bucket = bucket_start(start, granularity)
+        last_bucket = bucket_start(end, granularity)
+        closed_until = min(settled, last_bucket + step)
+
+        coverage_id = f"coverage:{metric}:{granularity}"
+        coverage = await self.rollups.find_one({"_id": coverage_id})
+        since = coverage["since"] if coverage else None
+        until = coverage["until"] if coverage else None
+
+        if first_bucket < closed_until:
+            if since is None or until < first_bucket or since > closed_until:
+                # Nothing materialized next to this range; start a fresh covered range
+                await self._materialize(metric, granularity, first_bucket, closed_until)
+                since, until = first_bucket, closed_until
+            else:
+                await self._materialize(metric, granularity, first_bucket, since)
+                await self._materialize(metric, granularity, until, closed_until)
+                since, until = min(since, first_bucket), max(until, closed_until)
+            await self.rollups.replace_one(
+                {"_id": coverage_id},
+                {"metric": metric, "granularity": granularity, "since": since, "until": until},
+                upsert=True
+            )
+
+        rows = {}
+        query = {"metric": metric, "granularity": granularity, "bucket": {"$gte": first_bucket, "$lt": closed_until}}
+        async for doc in self.rollups.find(query, {"_id": 0, "metric": 0, "granularity": 0}):
+            rows[doc.pop("bucket")] = doc
+        live_start, live_end = max(settled, first_bucket), min(open_bucket, last_bucket) + step
+        if live_start < live_end:
+            rows.update(await self.aggregate(metric, granularity, live_start, live_end))
+
+        series = []
+        for bucket in bucket_range(start, end, granularity):
+            row = rows.get(bucket, {"count": 0})
+            series.append({"bucket": bucket, "closed": bucket < open_bucket, **row})
+        return series
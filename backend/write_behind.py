@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Buffers documents in memory and persists them in batches with insert_many
+
+    A batch is flushed once `max_batch` documents are waiting or `flush_interval`
+    seconds have passed since its first document arrived, whichever comes first.
+    The queue holds at most `max_queue` documents; `put` waits when it is full,
+    so a slow database pushes back on callers instead of growing memory.
+    A batch that fails outright (e.g. the database is unreachable) is retried
+    up to `max_retries` times with exponential backoff starting at
+    `retry_backoff` seconds before it is dropped; while it waits, new documents
+    queue up behind it. `on_written`, if given, is awaited with the number of
+    documents each flush actually inserted.
+    """
+
+    def __init__(self, collection, max_batch: int = 100, flush_interval: float = 0.5, max_queue: int = 10000,
+                 on_written: Optional[Callable[[int], Awaitable[None]]] = None,
+                 max_retries: int = 5, retry_backoff: float = 0.5):
+        self.collection = collection
+        self.on_written = on_written
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._in_flight = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Documents accepted but not yet written"""
+        return self._queue.qsize() + self._in_flight
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, document: Dict[str, Any]) -> None:
+        await self._queue.put(document)
+
+    def _take(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        # A document off the queue stays pending until its batch has been flushed
+        self._in_flight += 1
+        return document
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [self._take(await self._queue.get())]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._take(await asyncio.wait_for(self._queue.get(), timeout)))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _insert(self, batch: List[Dict[str, Any]]) -> int:
+        """Insert a batch, retrying failures of the whole write; return how many were written"""
+        attempt = 0
+        while True:
+            try:
+                await self.collection.insert_many(batch, ordered=False)
+                return len(batch)
+            except BulkWriteError as e:
+                written = e.details.get("nInserted", 0)
+                if attempt:
+                    # Documents keep their _id between attempts, so duplicates were written by an earlier one
+                    written += sum(1 for error in e.details.get("writeErrors", []) if error.get("code") == 11000)
+                if written < len(batch):
+                    logger.error(f"Failed to write {len(batch) - written} of {len(batch)} documents to {self.collection.name}: {str(e)}")
+                return written
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    logger.error(f"Failed to write {len(batch)} documents to {self.collection.name} after {attempt + 1} attempts: {str(e)}")
+                    return 0
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"Retrying write of {len(batch)} documents to {self.collection.name} in {delay:.1f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            written = await self._insert(batch)
+            if written and self.on_written is not None:
+                await self.on_written(written)
+        finally:
+            self._in_flight -= len(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            await self._flush(batch)
+
+    async def _write_remaining(self) -> None:
+        if self._task is not None and not self._task.done():
+            # The writer flushes within flush_interval; once the queue is joined
+            # it is idle waiting for the next document and safe to cancel
+            await self._queue.join()
+            return
+        while not self._queue.empty():
+            batch = []
+            while not self._queue.empty() and len(batch) < self.max_batch:
+                batch.append(self._take(self._queue.get_nowait()))
+            await self._flush(batch)
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Write everything still queued, then stop the background writer
+
+        Gives up after `timeout` seconds, dropping what is still unwritten, so
+        a database outage during shutdown cannot hold the process past its
+        grace period while batches are retried.
+        """
+        try:
+            await asyncio.wait_for(self._write_remaining(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Dropped {self.pending} unwritten documents for {self.collection.name} after {timeout:.0f}s drain timeout")
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
@@ -1,155 +1,456 @@
-import requests
+"""
+Load-test and benchmark suite for the OpsVantage Digital API
+
+Boots `server.app` in-process against a local stand-in for MongoDB
+(mongomock-motor by default, or a real mongod via --mongo-url) and drives
+every route in `api_router` with concurrent async clients. Each scenario
+checks its expected status code and reports requests per second and latency
+percentiles. Results can be saved as JSON and diffed between commits.
+
+    python backend_test.py                                # in-process, mongomock
+    python backend_test.py --mongo-url mongodb://localhost:27017
+    python backend_test.py --url https://host/api         # a deployed instance
+    python backend_test.py --output bench.json --compare previous.json
+
+In-process runs also time a cold start (import plus first response of a fresh
+uvicorn process) unless --skip-startup is given. Install
+backend/requirements-dev.txt first; httpx and mongomock-motor are only needed
+here and by the benchmarks.
+"""
+import argparse
+import asyncio
 import json
-import uuid
+import logging
+import os
+import subprocess
+import sys
 import time
+import uuid
 from datetime import datetime
+from pathlib import Path
 
-# Get the backend URL from the frontend .env file
-BACKEND_URL = "https://f7e40010-2042-4d5f-9e68-384f0a30f42f.preview.emergentagent.com/api"
+import httpx
 
-def test_endpoint(method, endpoint, data=None, expected_status=200, test_name=""):
-    """
-    Test an API endpoint and return the result
-    """
-    url = f"{BACKEND_URL}{endpoint}"
-    headers = {"Content-Type": "application/json"}
-    
-    print(f"\n{'='*80}")
-    print(f"Testing: {test_name or endpoint}")
-    print(f"URL: {url}")
-    print(f"Method: {method}")
-    if data:
-        print(f"Data: {json.dumps(data, indent=2)}")
-    
-    try:
-        if method.lower() == "get":
-            response = requests.get(url, headers=headers)
-        elif method.lower() == "post":
-            response = requests.post(url, headers=headers, json=data)
-        else:
-            print(f"Unsupported method: {method}")
-            return False, None
-        
-        print(f"Status Code: {response.status_code} (Expected: {expected_status})")
-        
-        try:
-            response_data = response.json()
-            print(f"Response: {json.dumps(response_data, indent=2, default=str)}")
-        except:
-            print(f"Response: {response.text}")
-            response_data = response.text
-        
-        if response.status_code == expected_status:
-            print("✅ Test PASSED")
-            return True, response_data
-        else:
-            print("❌ Test FAILED - Unexpected status code")
-            return False, response_data
-            
-    except Exception as e:
-        print(f"❌ Test FAILED - Exception: {str(e)}")
-        return False, None
-
-def run_all_tests():
-    """
-    Run all API tests
-    """
-    results = {}
-    
-    # 1. Core API health check endpoints
-    results["root_endpoint"] = test_endpoint("GET", "/", expected_status=200, test_name="Main API health check")
-    results["health_endpoint"] = test_endpoint("GET", "/health", expected_status=200, test_name="Health status endpoint")
-    
-    # 2. Contact and Communication endpoints
-    contact_data = {
-        "name": "John Smith",
-        "email": "john.smith@example.com",
+ROOT_DIR = Path(__file__).parent
+BACKEND_DIR = ROOT_DIR / "backend"
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+def contact_payload(i):
+    return {
+        "name": f"Load Test {i}",
+        "email": f"load{i}@example.com",
         "company": "Acme Corp",
         "phone": "+1234567890",
         "service": "Web Development",
         "message": "I need a new website for my business",
         "budget": "$5,000-$10,000"
     }
-    results["submit_contact"] = test_endpoint("POST", "/contact", data=contact_data, expected_status=200, test_name="Submit contact form")
-    results["get_contacts"] = test_endpoint("GET", "/contact", expected_status=200, test_name="Retrieve contact forms")
-    
-    # 3. Newsletter subscription
-    newsletter_data = {
-        "email": f"subscriber_{int(time.time())}@example.com",
-        "name": "Newsletter Subscriber"
-    }
-    results["newsletter_subscribe"] = test_endpoint("POST", "/newsletter/subscribe", data=newsletter_data, expected_status=200, test_name="Subscribe to newsletter")
-    
-    # 4. Service inquiry
-    service_inquiry_data = {
-        "service_id": "web-development",
-        "client_name": "Jane Doe",
-        "client_email": "jane.doe@example.com",
+
+
+def inquiry_payload(i):
+    return {
+        "service_id": ["web-development", "ai-integration", "mobile-apps"][i % 3],
+        "client_name": f"Client {i}",
+        "client_email": f"client{i}@example.com",
         "client_phone": "+9876543210",
         "project_details": "I need a custom e-commerce website with payment integration",
         "budget_range": "$10,000-$20,000",
         "timeline": "3 months"
     }
-    results["service_inquiry"] = test_endpoint("POST", "/services/inquiry", data=service_inquiry_data, expected_status=200, test_name="Submit service inquiry")
-    results["get_service_inquiries"] = test_endpoint("GET", "/services/inquiries", expected_status=200, test_name="Get service inquiries")
-    
-    # 5. Digital Store endpoints
-    results["get_products"] = test_endpoint("GET", "/store/products", expected_status=200, test_name="Get all digital products")
-    
-    # Get a specific product (using the first product from the list if available)
-    success, products_data = results["get_products"]
-    if success and products_data and len(products_data) > 0:
-        product_id = products_data[0]["id"]
-        results["get_product_by_id"] = test_endpoint("GET", f"/store/products/{product_id}", expected_status=200, test_name=f"Get specific product (ID: {product_id})")
-    
-    # 6. Chat Bot endpoint
-    chat_data = {
-        "session_id": str(uuid.uuid4()),
-        "message": "What services do you offer?"
+
+
+def build_scenarios(run_id, product_id, in_memory_db):
+    """
+    One scenario per route: method, route template, a request factory taking
+    the request number, and the expected status code
+    """
+    chat_messages = ["What services do you offer?", "How much does web development cost?", "Tell me about AI automation"]
+    scenarios = [
+        {"route": "/api/", "method": "GET", "request": lambda i: {"url": "/api/"}},
+        {"route": "/api/health", "method": "GET", "request": lambda i: {"url": "/api/health"}},
+        {"route": "/api/ready", "method": "GET", "request": lambda i: {"url": "/api/ready"}},
+        {"route": "/api/contact", "method": "POST", "request": lambda i: {"url": "/api/contact", "json": contact_payload(i)}},
+        {"route": "/api/contact/bulk", "method": "POST", "request": lambda i: {"url": "/api/contact/bulk", "json": [contact_payload(i * 10 + n) for n in range(10)]}},
+        {"route": "/api/contact", "method": "GET", "request": lambda i: {"url": "/api/contact", "params": {"limit": 50}}},
+        {"route": "/api/contact/queue", "method": "GET", "request": lambda i: {"url": "/api/contact/queue", "params": {"service": "Web Development", "limit": 50}}},
+        # Contacts posted by the scenarios above keep the queue from running dry
+        {"route": "/api/contact/claim", "method": "POST", "request": lambda i: {"url": "/api/contact/claim", "json": {"assigned_to": f"admin-{i % 5}"}}},
+        # Unknown ids exercise the conflict diagnosis path
+        {"route": "/api/contact/{contact_id}", "method": "PATCH", "expected_status": 404,
+         "request": lambda i: {"url": f"/api/contact/missing-{i}", "json": {"status": "closed", "version": 1}}},
+        {"route": "/api/newsletter/subscribe", "method": "POST", "request": lambda i: {"url": "/api/newsletter/subscribe", "json": {"email": f"sub{i}-{run_id}@example.com", "name": "Subscriber"}}},
+        {"route": "/api/newsletter/unsubscribe", "method": "POST", "request": lambda i: {"url": "/api/newsletter/unsubscribe", "json": {"email": f"sub{i}-{run_id}@example.com"}},
+         # mongomock mis-evaluates multi-field filters on indexed collections
+         "skip_in_memory": True},
+        {"route": "/api/newsletter/bulk", "method": "POST", "request": lambda i: {"url": "/api/newsletter/bulk", "json": [{"email": f"bulk{i}-{n}-{run_id}@example.com"} for n in range(10)]}},
+        {"route": "/api/services/inquiry", "method": "POST", "request": lambda i: {"url": "/api/services/inquiry", "json": inquiry_payload(i)}},
+        {"route": "/api/services/inquiry/bulk", "method": "POST", "request": lambda i: {"url": "/api/services/inquiry/bulk", "json": [inquiry_payload(i * 10 + n) for n in range(10)]}},
+        {"route": "/api/services/inquiries", "method": "GET", "request": lambda i: {"url": "/api/services/inquiries", "params": {"limit": 50}}},
+        {"route": "/api/services/inquiries/queue", "method": "GET", "request": lambda i: {"url": "/api/services/inquiries/queue", "params": {"limit": 50}}},
+        {"route": "/api/services/inquiries/claim", "method": "POST", "request": lambda i: {"url": "/api/services/inquiries/claim", "json": {"assigned_to": f"admin-{i % 5}"}}},
+        {"route": "/api/services/inquiry/{inquiry_id}", "method": "PATCH", "expected_status": 404,
+         "request": lambda i: {"url": f"/api/services/inquiry/missing-{i}", "json": {"status": "quoted", "version": 1}}},
+        {"route": "/api/store/products", "method": "GET", "request": lambda i: {"url": "/api/store/products"}},
+        {"route": "/api/store/products", "method": "GET", "name": "filtered", "request": lambda i: {"url": "/api/store/products", "params": {"max_price": 150, "fields": "title,price,category"}}},
+        {"route": "/api/store/products/facets", "method": "GET", "request": lambda i: {"url": "/api/store/products/facets"}},
+        {"route": "/api/store/products/{product_id}", "method": "GET", "request": lambda i: {"url": f"/api/store/products/{product_id}"}},
+        {"route": "/api/store/cache/invalidate", "method": "POST", "request": lambda i: {"url": "/api/store/cache/invalidate"}},
+        {"route": "/api/chat", "method": "POST", "request": lambda i: {"url": "/api/chat", "json": {"session_id": f"session-{i % 20}", "message": chat_messages[i % len(chat_messages)]}}},
+        {"route": "/api/chat/{session_id}/history", "method": "GET", "request": lambda i: {"url": f"/api/chat/session-{i % 20}/history", "params": {"limit": 20}}},
+        {"route": "/api/search", "method": "GET", "request": lambda i: {"url": "/api/search", "params": {"q": ["ai", "web development", "marketing templates"][i % 3]}},
+         # $text is not implemented by mongomock
+         "skip_in_memory": True},
+        {"route": "/api/analytics/overview", "method": "GET", "request": lambda i: {"url": "/api/analytics/overview"}},
+        {"route": "/api/notifications/outbox", "method": "GET", "request": lambda i: {"url": "/api/notifications/outbox"}},
+        # Requeue answers 404 when the server runs without SMTP_HOST, i.e. with notifications off
+        {"route": "/api/notifications/requeue", "method": "POST", "request": lambda i: {"url": "/api/notifications/requeue"},
+         "expected_status": 200 if os.environ.get("SMTP_HOST") else 404},
+        {"route": "/api/analytics/timeseries", "method": "GET", "request": lambda i: {"url": "/api/analytics/timeseries", "params": {"granularity": "hour"}},
+         # $dateTrunc is not implemented by mongomock
+         "skip_in_memory": True},
+        {"route": "/api/analytics/indexes", "method": "GET", "request": lambda i: {"url": "/api/analytics/indexes"},
+         # explain() is not implemented by mongomock
+         "skip_in_memory": True},
+        {"route": "/api/export/{collection}", "method": "GET", "request": lambda i: {"url": "/api/export/newsletter_subscriptions"}},
+        {"route": "/api/export/{collection}", "method": "GET", "name": "parquet", "request": lambda i: {"url": "/api/export/chat_messages", "params": {"format": "parquet"}}},
+        {"route": "/api/export/{collection}", "method": "GET", "name": "resume", "expected_status": 206,
+         "request": lambda i: {"url": "/api/export/contact_forms", "params": {"end": "2000-01-01T00:00:00"}, "headers": {"Range": "bytes=10-"}}},
+        {"route": "/api/metrics", "method": "GET", "request": lambda i: {"url": "/api/metrics"}},
+        {"route": "/api/metrics/slow", "method": "GET", "request": lambda i: {"url": "/api/metrics/slow"}},
+        {"route": "/api/status", "method": "POST", "request": lambda i: {"url": "/api/status", "json": {"client_name": f"Load Test {i}"}}},
+        {"route": "/api/status", "method": "GET", "request": lambda i: {"url": "/api/status", "params": {"limit": 50}}},
+    ]
+    if in_memory_db:
+        scenarios = [scenario for scenario in scenarios if not scenario.get("skip_in_memory")]
+    return scenarios
+
+
+async def run_scenario(client, scenario, total_requests, concurrency):
+    """
+    Fire `total_requests` requests from `concurrency` workers and summarize them
+    """
+    expected_status = scenario.get("expected_status", 200)
+    latencies = []
+    errors = []
+    counter = iter(range(total_requests))
+
+    async def worker():
+        for i in counter:
+            request = scenario["request"](i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(scenario["method"], **request)
+                status = response.status_code
+            except Exception as e:
+                status = f"{type(e).__name__}: {str(e)}"
+            latencies.append(time.perf_counter() - start)
+            if status != expected_status:
+                errors.append(status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "route": scenario["route"],
+        "method": scenario["method"],
+        "name": scenario.get("name", ""),
+        "requests": total_requests,
+        "errors": len(errors),
+        "sample_errors": errors[:5],
+        "rps": total_requests / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0
     }
-    results["chat_services"] = test_endpoint("POST", "/chat", data=chat_data, expected_status=200, test_name="Chat with AI assistant - Services question")
-    
-    chat_data = {
-        "session_id": str(uuid.uuid4()),
-        "message": "How much does web development cost?"
+
+
+async def check_newsletter_concurrency(client, server=None, concurrency=200):
+    """
+    Fire many simultaneous subscribes for one email: exactly one may succeed,
+    exactly one row may be stored (checked when the app runs in-process), and
+    each request should cost no more than a single insert
+    """
+    email = f"race_{uuid.uuid4().hex}@example.com"
+
+    async def subscribe(address):
+        start = time.perf_counter()
+        response = await client.post("/api/newsletter/subscribe", json={"email": address, "name": "Race Test"})
+        return response.status_code, time.perf_counter() - start
+
+    _, single_latency = await subscribe(f"single_{uuid.uuid4().hex}@example.com")
+    results = await asyncio.gather(*[subscribe(email) for _ in range(concurrency)])
+    created = sum(1 for status, _ in results if status == 200)
+    duplicates = sum(1 for status, _ in results if status == 400)
+    # The same address with different casing must also be a duplicate
+    upper_status, _ = await subscribe(email.upper())
+    stored = await server.db.newsletter_subscriptions.count_documents({"email": email}) if server is not None else None
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "passed": created == 1 and duplicates == concurrency - 1 and upper_status == 400 and stored in (1, None),
+        "created": created,
+        "duplicates": duplicates,
+        "stored": stored,
+        "different_case_status": upper_status,
+        "single_insert_ms": single_latency * 1000,
+        "concurrent_p50_ms": percentile(latencies, 0.50) * 1000
     }
-    results["chat_cost"] = test_endpoint("POST", "/chat", data=chat_data, expected_status=200, test_name="Chat with AI assistant - Cost question")
-    
-    # 7. Analytics endpoint
-    results["analytics_overview"] = test_endpoint("GET", "/analytics/overview", expected_status=200, test_name="Get analytics overview")
-    
-    # 8. Legacy endpoints
-    status_data = {
-        "client_name": "Test Client"
+
+
+async def check_rate_limit(client, server=None, burst=50):
+    """
+    Fire a burst of chat messages for one session: once its bucket is empty the
+    server must answer 429 with a Retry-After header
+    """
+    session_id = f"flood-{uuid.uuid4().hex}"
+    if server is not None:
+        # Limits are off in-process for the load scenarios; switch them on just for this check
+        server.rate_limiter.enabled = True
+    try:
+        responses = await asyncio.gather(*[
+            client.post("/api/chat", json={"session_id": session_id, "message": "hello"}) for _ in range(burst)
+        ])
+    finally:
+        if server is not None:
+            server.rate_limiter.enabled = False
+    limited = [response for response in responses if response.status_code == 429]
+    return {
+        "passed": bool(limited) and all(response.headers.get("retry-after", "").isdigit() for response in limited),
+        "accepted": sum(1 for response in responses if response.status_code == 200),
+        "limited": len(limited),
+        "retry_after": limited[0].headers.get("retry-after") if limited else None
     }
-    results["create_status"] = test_endpoint("POST", "/status", data=status_data, expected_status=200, test_name="Create status check")
-    results["get_status"] = test_endpoint("GET", "/status", expected_status=200, test_name="Get status checks")
-    
-    # Print summary
-    print("\n" + "="*80)
-    print("TEST SUMMARY")
-    print("="*80)
-    
-    passed = 0
-    failed = 0
-    
-    for test_name, (success, _) in results.items():
-        status = "✅ PASSED" if success else "❌ FAILED"
-        print(f"{test_name}: {status}")
-        if success:
-            passed += 1
-        else:
-            failed += 1
-    
-    print(f"\nTotal: {passed + failed}, Passed: {passed}, Failed: {failed}")
-    print(f"Success Rate: {passed/(passed + failed) * 100:.2f}%")
-    
-    return results
 
-if __name__ == "__main__":
-    print(f"Testing OpsVantage Digital Backend API")
-    print(f"Backend URL: {BACKEND_URL}")
+
+async def check_lead_claims(client, leads=20):
+    """
+    Let twice as many admins as there are queued contacts claim at once: every
+    contact must go to exactly one admin and the rest must find the queue empty
+    """
+    service = f"claims-{uuid.uuid4().hex}"
+    for n in range(leads):
+        await client.post("/api/contact", json={**contact_payload(n), "service": service})
+    responses = await asyncio.gather(*[
+        client.post("/api/contact/claim", json={"assigned_to": f"admin-{n}", "service": service}) for n in range(leads * 2)
+    ])
+    claimed = [response.json()["id"] for response in responses if response.status_code == 200]
+    empty = sum(1 for response in responses if response.status_code == 404)
+    return {
+        "passed": len(claimed) == leads and len(set(claimed)) == leads and empty == leads,
+        "claimed": len(claimed),
+        "distinct": len(set(claimed)),
+        "empty": empty
+    }
+
+
+def uncovered_routes(server, scenarios):
+    covered = {(scenario["method"], scenario["route"]) for scenario in scenarios}
+    missing = []
+    for route in server.api_router.routes:
+        for method in route.methods:
+            if (method, route.path) not in covered:
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+def patch_mongomock():
+    """
+    Make mongomock's find_one_and_update update the document it returns.
+    mongomock re-runs the filter without the sort unless it can update by
+    _id, so a sorted claim projected without _id can update one lead and
+    return another. Real MongoDB does not depend on the projection.
+    """
+    from mongomock.collection import Collection
+    find_and_modify = Collection._find_and_modify
+    if getattr(find_and_modify, "keeps_id", False):
+        return
+
+    def keeping_id(self, query, projection=None, *args, **kwargs):
+        if not isinstance(projection, dict) or projection.get("_id", True):
+            return find_and_modify(self, query, projection, *args, **kwargs)
+        projection = {field: value for field, value in projection.items() if field != "_id"} or None
+        doc = find_and_modify(self, query, projection, *args, **kwargs)
+        if doc is not None:
+            doc.pop("_id", None)
+        return doc
+
+    keeping_id.keeps_id = True
+    Collection._find_and_modify = keeping_id
+
+
+def load_server(mongo_url):
+    """
+    Import the backend with MONGO_URL pointing at a local database, or at
+    mongomock-motor when no URL is given
+    """
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ["MONGO_URL"] = mongo_url or "mongodb://localhost:27017"
+    # A throwaway database, so a local mongod's real data is never touched
+    os.environ["DB_NAME"] = f"load_test_{uuid.uuid4().hex[:8]}"
+    # Every request comes from one client, so per-IP limits would reject most of the load
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if not mongo_url:
+        import motor.motor_asyncio
+        from mongomock_motor import AsyncMongoMockClient
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+        patch_mongomock()
+    import server
+    # Per-request INFO logging would dominate the measurements
+    logging.getLogger().setLevel(logging.WARNING)
+    return server
+
+
+def measure_startup(mongo_url, runs=3):
+    """
+    Median cold-start times of the backend in fresh processes, see
+    backend/benchmarks/bench_startup.py
+    """
+    from benchmarks.bench_startup import measure
+    return measure(runs=runs, mongo_url=mongo_url)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, previous=None):
+    previous_results = {}
+    if previous:
+        previous_results = {(result["method"], result["route"], result.get("name", "")): result for result in previous["results"]}
+
+    print(f"\n{'endpoint':<46} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}  {'vs previous p95':>15}")
+    print("=" * 110)
+    for result in report["results"]:
+        endpoint = f"{result['method']} {result['route']}" + (f" ({result['name']})" if result["name"] else "")
+        delta = ""
+        before = previous_results.get((result["method"], result["route"], result["name"]))
+        if before and before["p95_ms"]:
+            delta = f"{(result['p95_ms'] / before['p95_ms'] - 1) * 100:+.1f}%"
+        print(f"{endpoint:<46} {result['rps']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>6}  {delta:>15}")
+        if result["sample_errors"]:
+            print(f"    ❌ unexpected statuses: {result['sample_errors']}")
+
+    race = report.get("newsletter_concurrency")
+    if race:
+        status = "✅ PASSED" if race["passed"] else "❌ FAILED"
+        stored = f", stored {race['stored']}" if race.get("stored") is not None else ""
+        print(f"\nNewsletter concurrency: {status} - created {race['created']}, duplicates {race['duplicates']}{stored}, "
+              f"single insert {race['single_insert_ms']:.2f} ms, concurrent p50 {race['concurrent_p50_ms']:.2f} ms")
+    limit = report.get("rate_limit")
+    if limit:
+        status = "✅ PASSED" if limit["passed"] else "❌ FAILED"
+        print(f"Rate limiting: {status} - accepted {limit['accepted']}, limited {limit['limited']}, "
+              f"Retry-After {limit['retry_after']}")
+    claims = report.get("lead_claims")
+    if claims:
+        status = "✅ PASSED" if claims["passed"] else "❌ FAILED"
+        print(f"Lead claims: {status} - claimed {claims['claimed']} ({claims['distinct']} distinct), "
+              f"queue empty {claims['empty']}")
+    startup = report.get("startup")
+    if startup:
+        before = (previous or {}).get("startup") or {}
+        parts = []
+        for key, label in (("import_ms", "import"), ("first_response_ms", "first response")):
+            change = f" ({(startup[key] / before[key] - 1) * 100:+.1f}%)" if before.get(key) else ""
+            parts.append(f"{label} {startup[key]:.1f} ms{change}")
+        print(f"Cold start: {', '.join(parts)}")
+    if report.get("uncovered_routes"):
+        print(f"\n⚠️  Routes not exercised: {', '.join(report['uncovered_routes'])}")
+        if report.get("target") == "in-process (mongomock)":
+            print("   Routes that need a real mongod only run with --mongo-url")
+
+
+async def run_all_tests(args):
+    """
+    Run every scenario and return the JSON-serializable report
+    """
+    run_id = uuid.uuid4().hex[:8]
+    server = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url.rstrip("/").removesuffix("/api"), timeout=30)
+    else:
+        server = load_server(args.mongo_url)
+        await server.app.router.startup()
+        # Indexes and sample products are set up in the background after startup
+        await server.startup_complete.wait()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://testserver", timeout=30)
+
+    try:
+        products = (await client.get("/api/store/products")).json()
+        product_id = products[0]["id"] if products else "missing"
+        scenarios = build_scenarios(run_id, product_id, in_memory_db=server is not None and not args.mongo_url)
+
+        results = []
+        for scenario in scenarios:
+            if args.only and args.only not in scenario["route"]:
+                continue
+            results.append(await run_scenario(client, scenario, args.requests, args.concurrency))
+
+        report = {
+            "revision": git_revision(),
+            "generated_at": datetime.utcnow().isoformat(),
+            "target": args.url or args.mongo_url or "in-process (mongomock)",
+            "requests_per_endpoint": args.requests,
+            "concurrency": args.concurrency,
+            "results": results,
+            "newsletter_concurrency": await check_newsletter_concurrency(client, server),
+            "rate_limit": await check_rate_limit(client, server),
+            "lead_claims": await check_lead_claims(client),
+            "startup": measure_startup(args.mongo_url) if server is not None and not args.skip_startup else None,
+            "uncovered_routes": uncovered_routes(server, scenarios) if server else []
+        }
+    finally:
+        await client.aclose()
+        if server is not None:
+            await server.app.router.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test every OpsVantage Digital API route")
+    parser.add_argument("--url", help="Benchmark a running instance instead of booting the app in-process")
+    parser.add_argument("--mongo-url", help="Local mongod to use in-process (default: mongomock-motor)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients per endpoint")
+    parser.add_argument("--only", help="Only run scenarios whose route contains this string")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--skip-startup", action="store_true", help="Do not time a cold start of the backend")
+    parser.add_argument("--compare", help="Previous JSON report to diff p95 latency against")
+    args = parser.parse_args()
+
+    print("Benchmarking OpsVantage Digital Backend API")
+    print(f"Target: {args.url or args.mongo_url or 'in-process (mongomock)'}")
     print(f"Timestamp: {datetime.now()}")
-    print("="*80)
-    
-    run_all_tests()
+
+    report = asyncio.run(run_all_tests(args))
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(report, previous)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    failed = any(result["errors"] for result in report["results"]) or not report["newsletter_concurrency"]["passed"]
+    failed = failed or not report["rate_limit"]["passed"] or not report["lead_claims"]["passed"]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend runs from its own directory and imports its modules top-level
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+
+
+@pytest.fixture(scope="session")
+def server_module():
+    """The backend app module, wired to mongomock-motor instead of a real mongod"""
+    from backend_test import load_server
+    return load_server(None)
+
+
+@pytest.fixture
+def server(server_module):
+    """The backend module with every collection emptied before the test"""
+    async def reset():
+        for name in await server_module.db.list_collection_names():
+            await server_module.db.drop_collection(name)
+
+    asyncio.run(reset())
+    return server_module
@@ -0,0 +1,109 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from bulk import BulkIngest, iter_rows
+
+
+class SubscriberCreate(BaseModel):
+    email: str
+    name: Optional[str] = None
+
+
+class Subscriber(SubscriberCreate):
+    status: str = "active"
+
+
+def make_request(body: bytes, content_type: str, chunk_size: int = 7):
+    chunks = [body[start:start + chunk_size] for start in range(0, len(body), chunk_size)] or [b""]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": [(b"content-type", content_type.encode())]}, receive)
+
+
+def ndjson(*lines):
+    return "\n".join(lines).encode()
+
+
+async def collection_with_unique_email():
+    collection = AsyncMongoMockClient()["bulk_test"]["subscribers"]
+    await collection.create_index("email", unique=True)
+    return collection
+
+
+def ingest(body, content_type="application/x-ndjson", max_rows=None, batch_size=1000, existing=()):
+    """Run an upload; return its report (or the HTTPException it raised), the inserted batches and the stored count"""
+    inserted_batches = []
+
+    async def on_inserted(docs):
+        inserted_batches.append([doc["email"] for doc in docs])
+
+    async def run():
+        collection = await collection_with_unique_email()
+        for email in existing:
+            await collection.insert_one({"email": email})
+        bulk = BulkIngest(collection, SubscriberCreate, Subscriber, batch_size=batch_size, on_inserted=on_inserted, max_rows=max_rows)
+        try:
+            report = await bulk.run(iter_rows(make_request(body, content_type), max_rows))
+        except HTTPException as e:
+            report = e
+        return report, inserted_batches, await collection.count_documents({})
+
+    return asyncio.run(run())
+
+
+def test_bad_rows_are_reported_by_index_and_the_rest_imported():
+    body = ndjson(
+        '{"email": "a@example.com"}',
+        '{not json',
+        '["a", "list"]',
+        '{"name": "no email"}',
+        '',
+        '{"email": "b@example.com", "name": "B"}',
+    )
+    report, batches, stored = ingest(body)
+
+    assert (report["received"], report["inserted"], report["failed"], report["duplicates"]) == (5, 2, 3, 0)
+    assert [error["index"] for error in report["errors"]] == [1, 2, 3]
+    assert report["errors"][0]["error"].startswith("Invalid JSON")
+    assert report["errors"][1]["error"] == "Row must be a JSON object"
+    assert report["errors"][2]["error"].startswith("email:")
+    assert batches == [["a@example.com", "b@example.com"]]
+    assert stored == 2
+
+
+def test_unique_index_rejections_count_as_duplicates():
+    rows = [{"email": "new@example.com"}, {"email": "old@example.com"}, {"email": "new@example.com"}]
+    report, batches, stored = ingest(json.dumps(rows).encode(), "application/json", existing=["old@example.com"])
+
+    assert (report["received"], report["inserted"], report["duplicates"], report["failed"]) == (3, 1, 2, 0)
+    assert report["errors"] == []
+    assert batches == [["new@example.com"]]
+    assert stored == 2
+
+
+def test_json_array_over_the_limit_is_rejected_before_writing():
+    rows = [{"email": f"user{n}@example.com"} for n in range(4)]
+    error, batches, stored = ingest(json.dumps(rows).encode(), "application/json", max_rows=3)
+
+    assert isinstance(error, HTTPException) and error.status_code == 413
+    assert stored == 0
+
+
+def test_ndjson_over_the_limit_stops_with_the_report_so_far():
+    body = ndjson(*(json.dumps({"email": f"user{n}@example.com"}) for n in range(5)))
+    error, batches, stored = ingest(body, max_rows=3, batch_size=2)
+
+    assert isinstance(error, HTTPException) and error.status_code == 413
+    assert "limited to 3 rows" in error.detail["error"]
+    # The first full batch was already written and stays imported
+    assert (error.detail["received"], error.detail["inserted"]) == (3, 2)
+    assert stored == 2
@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import catalog_cache
+from catalog_cache import CatalogCache, etag_matches
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(catalog_cache.time, "monotonic", clock.monotonic)
+    return clock
+
+
+class Loader:
+    """Counts loads of a fixed catalog"""
+
+    def __init__(self, ids):
+        self.products = {product_id: json.dumps({"id": product_id}) for product_id in ids}
+        self.list_loads = 0
+        self.item_loads = []
+
+    async def load_list(self):
+        self.list_loads += 1
+        return list(self.products.items())
+
+    async def load_item(self, product_id):
+        self.item_loads.append(product_id)
+        return self.products.get(product_id)
+
+
+def test_list_is_served_from_cache_until_it_expires(clock):
+    cache, loader = CatalogCache(ttl=60), Loader(["a", "b"])
+
+    body, etag = asyncio.run(cache.get_list(loader.load_list))
+    assert json.loads(body) == [{"id": "a"}, {"id": "b"}]
+    assert asyncio.run(cache.get_list(loader.load_list)) == (body, etag)
+    assert loader.list_loads == 1
+
+    clock.now += 60
+    asyncio.run(cache.get_list(loader.load_list))
+    assert loader.list_loads == 2
+
+
+def test_complete_catalog_answers_unknown_ids_without_a_read(clock):
+    cache, loader = CatalogCache(ttl=60), Loader(["a", "b"])
+    asyncio.run(cache.get_list(loader.load_list))
+
+    assert asyncio.run(cache.get_item("a", loader.load_item))[0] == b'{"id": "a"}'
+    assert asyncio.run(cache.get_item("missing", loader.load_item)) is None
+    assert loader.item_loads == []
+
+    # Once the list has expired, a miss is no longer definite
+    clock.now += 60
+    assert asyncio.run(cache.get_item("missing", loader.load_item)) is None
+    assert loader.item_loads == ["missing"]
+
+
+def test_eviction_makes_misses_go_to_the_loader(clock):
+    cache, loader = CatalogCache(ttl=60, max_items=2), Loader(["a", "b", "c"])
+    asyncio.run(cache.get_list(loader.load_list))
+
+    # Only the two most recent products fit, so the map is no longer complete
+    assert cache.stats()["items_cached"] == 2
+    assert asyncio.run(cache.get_item("a", loader.load_item))[0] == b'{"id": "a"}'
+    assert loader.item_loads == ["a"]
+
+
+def test_least_recently_used_item_is_evicted_first(clock):
+    cache, loader = CatalogCache(ttl=60, max_items=2), Loader(["a", "b", "c"])
+    for product_id in ["a", "b", "a", "c"]:
+        asyncio.run(cache.get_item(product_id, loader.load_item))
+    loader.item_loads.clear()
+
+    asyncio.run(cache.get_item("a", loader.load_item))
+    asyncio.run(cache.get_item("b", loader.load_item))
+    assert loader.item_loads == ["b"]
+
+
+def test_invalidating_one_product_drops_it_and_the_list(clock):
+    cache, loader = CatalogCache(ttl=60), Loader(["a", "b"])
+    asyncio.run(cache.get_list(loader.load_list))
+
+    cache.invalidate("a")
+    assert cache.stats()["list_cached"] is False
+    assert cache.stats()["items_cached"] == 1
+    asyncio.run(cache.get_item("a", loader.load_item))
+    assert loader.item_loads == ["a"]
+
+    cache.invalidate()
+    assert cache.stats()["items_cached"] == 0
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", "abc"', True),
+    ("*", True),
+    ('"other"', False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_unchanged_catalog_is_answered_with_304(server):
+    server.catalog_cache.invalidate()
+
+    async def run():
+        await server.db.digital_products.insert_one({
+            "id": "p1", "title": "Guide", "description": "A guide", "type": "ebook", "price": 10.0,
+            "features": [], "image_url": "https://example.com/p1.png", "category": "Guides", "is_active": True
+        })
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            listed = await client.get("/api/store/products")
+            revalidated = await client.get("/api/store/products", headers={"If-None-Match": listed.headers["etag"]})
+            item = await client.get("/api/store/products/p1")
+            item_revalidated = await client.get("/api/store/products/p1", headers={"If-None-Match": item.headers["etag"]})
+            missing = await client.get("/api/store/products/nope")
+        return listed, revalidated, item, item_revalidated, missing
+
+    listed, revalidated, item, item_revalidated, missing = asyncio.run(run())
+
+    assert [product["id"] for product in listed.json()] == ["p1"]
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert item.json()["id"] == "p1"
+    assert item_revalidated.status_code == 304
+    assert missing.status_code == 404
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+from chat_sessions import SessionWindows
+
+
+def test_window_keeps_only_the_latest_turns():
+    sessions = SessionWindows(turns=3)
+    for intent in ["pricing", None, "web", "contact"]:
+        sessions.append("s1", intent)
+
+    assert list(sessions.get("s1")) == [None, "web", "contact"]
+
+
+def test_least_recently_used_session_is_evicted():
+    sessions = SessionWindows(max_sessions=2)
+    sessions.append("s1", "pricing")
+    sessions.append("s2", "web")
+    sessions.get("s1")
+    sessions.load("s3", ["ai"])
+
+    assert len(sessions) == 2
+    assert sessions.get("s2") is None
+    assert list(sessions.get("s1")) == ["pricing"]
+
+
+def test_history_pages_newest_first(server):
+    start = datetime(2024, 1, 1)
+    messages = [
+        {"id": f"m{n}", "session_id": "s1", "message": f"hello {n}", "response": "hi", "intent": None,
+         "timestamp": start + timedelta(minutes=n)}
+        for n in range(3)
+    ]
+    messages.append({**messages[0], "id": "other", "session_id": "s2"})
+
+    async def run():
+        await server.db.chat_messages.insert_many([dict(message) for message in messages])
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get("/api/chat/s1/history", params={"limit": 2})
+            second = await client.get("/api/chat/s1/history", params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert [message["id"] for message in first.json()] == ["m2", "m1"]
+    assert [message["id"] for message in second.json()] == ["m0"]
+    assert "x-next-cursor" not in second.headers
+
+
+def test_chat_context_comes_from_stored_intents(server):
+    server.chat_sessions._sessions.clear()
+
+    async def run():
+        await server.db.chat_messages.insert_one({
+            "id": "m0", "session_id": "s1", "message": "how much does it cost?", "response": "...",
+            "intent": "pricing", "timestamp": datetime.utcnow()
+        })
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/chat", json={"session_id": "s1", "message": "yes please"})
+
+    asyncio.run(run())
+
+    assert list(server.chat_sessions.get("s1")) == ["pricing", "pricing"]
@@ -0,0 +1,90 @@
+import asyncio
+import csv
+import io
+from datetime import datetime, timedelta
+
+import httpx
+
+from export import csv_chunks, export_fingerprint
+
+
+async def rows(docs):
+    for doc in docs:
+        yield doc
+
+
+def export_csv(docs, columns):
+    async def collect():
+        return b"".join([chunk async for chunk in csv_chunks(rows(docs), columns)])
+    return list(csv.reader(io.StringIO(asyncio.run(collect()).decode())))
+
+
+def test_csv_neutralizes_formula_cells():
+    docs = [{
+        "name": '=HYPERLINK("http://evil.example","click")',
+        "company": "+1 ACME",
+        "message": "-2+3",
+        "budget": "@SUM(A1)",
+        "phone": "\t=1",
+        "service": "Web Development",
+    }]
+    columns = ["name", "company", "message", "budget", "phone", "service"]
+    header, row = export_csv(docs, columns)
+    assert header == columns
+    assert row == ["'=HYPERLINK(\"http://evil.example\",\"click\")", "'+1 ACME", "'-2+3", "'@SUM(A1)", "'\t=1", "Web Development"]
+
+
+def test_csv_keeps_numbers_and_lists_readable():
+    header, row = export_csv([{"price": -5, "features": ["=a", "b"], "rating": 4.5}], ["price", "features", "rating"])
+    assert row == ["-5", "'=a; b", "4.5"]
+
+
+def test_fingerprint_changes_when_a_row_is_updated_in_place():
+    fields = ["id", "status", "version"]
+    before = [{"id": "a", "status": "new", "version": 0}, {"id": "b", "status": "new", "version": 0}]
+    after = [{"id": "a", "status": "in_progress", "version": 1}, {"id": "b", "status": "new", "version": 0}]
+
+    def fingerprint(docs):
+        return asyncio.run(export_fingerprint(rows(docs), fields))
+
+    assert fingerprint(before) == fingerprint([dict(doc) for doc in before])
+    assert fingerprint(before) != fingerprint(after)
+    assert fingerprint(before).startswith("2:")
+
+
+def test_csv_leaves_phone_numbers_and_signed_numbers_alone():
+    docs = [{"phone": "+64 21 555 0199", "alt": "+1 (555) 010-0199", "delta": "-12.5", "formula": "+64+SUM(A1)"}]
+    header, row = export_csv(docs, ["phone", "alt", "delta", "formula"])
+    assert row == ["+64 21 555 0199", "+1 (555) 010-0199", "-12.5", "'+64+SUM(A1)"]
+
+
+def test_resumed_export_matches_the_full_download(server):
+    start = datetime(2024, 1, 1)
+    leads = [
+        {"id": f"c{n}", "name": f"Lead {n}", "email": f"lead{n}@example.com", "message": "hello",
+         "phone": "+64 21 555 0199", "status": "new", "timestamp": start + timedelta(minutes=n)}
+        for n in range(20)
+    ]
+
+    async def run():
+        await server.db.contact_forms.insert_many(leads)
+        params = {"end": "2024-02-01T00:00:00"}
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            full = await client.get("/api/export/contact_forms", params=params)
+            resumes = [
+                await client.get("/api/export/contact_forms", params=params,
+                                 headers={"Range": "bytes=100-", "If-Range": full.headers["etag"]})
+                for _ in range(2)
+            ]
+        return full, resumes
+
+    server.export_sizes.clear()
+    full, resumes = asyncio.run(run())
+
+    assert b"+64 21 555 0199" in full.content
+    for resumed in resumes:
+        assert resumed.status_code == 206
+        assert resumed.content == full.content[100:]
+        assert resumed.headers["content-range"] == f"bytes 100-{len(full.content) - 1}/{len(full.content)}"
+    assert server.export_sizes == {full.headers["etag"]: len(full.content)}
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from http_cache import HTTPCacheMiddleware
+
+
+def make_client():
+    app = FastAPI()
+
+    @app.get("/api/")
+    async def root():
+        return {"message": "hello"}
+
+    @app.get("/api/analytics/overview")
+    async def overview():
+        return {"total": 1, "generated_at": datetime.utcnow()}
+
+    app.add_middleware(
+        HTTPCacheMiddleware,
+        policies={"/api/": "public, max-age=300", "/api/analytics/overview": "private, max-age=10"},
+        without_etag={"/api/analytics/overview"},
+    )
+    return TestClient(app)
+
+
+def test_stable_route_answers_conditionals_with_304():
+    client = make_client()
+    first = client.get("/api/")
+    assert first.headers["cache-control"] == "public, max-age=300"
+    second = client.get("/api/", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert second.content == b""
+
+
+def test_volatile_route_gets_cache_control_without_etag():
+    client = make_client()
+    response = client.get("/api/analytics/overview")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, max-age=10"
+    assert "etag" not in response.headers
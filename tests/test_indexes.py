@@ -0,0 +1,89 @@
+"""Declared indexes, checked against a real mongod where mongomock falls short
+
+Set TEST_MONGO_URL to run those; explain() and text indexes are not
+available in mongomock, so they are skipped without a server.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, IndexModel
+
+from indexes import ensure_indexes, index_drift, queries_missing_index
+
+TEST_MONGO_URL = os.environ.get("TEST_MONGO_URL")
+
+requires_mongod = pytest.mark.skipif(not TEST_MONGO_URL, reason="TEST_MONGO_URL is not set")
+
+
+def run_against_fresh_database(check):
+    async def run():
+        client = AsyncIOMotorClient(TEST_MONGO_URL, serverSelectionTimeoutMS=5000)
+        db = client[f"index_check_{uuid.uuid4().hex}"]
+        try:
+            return await check(db)
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+    return asyncio.run(run())
+
+
+@requires_mongod
+def test_declared_indexes_deploy_without_drift():
+    import server
+
+    async def check(db):
+        assert await ensure_indexes(db, server.INDEXES) == {}
+        assert await index_drift(db, server.INDEXES) == {}
+
+    run_against_fresh_database(check)
+
+
+@requires_mongod
+def test_hot_queries_are_served_by_an_index():
+    import server
+
+    async def check(db):
+        await ensure_indexes(db, server.INDEXES)
+        assert await queries_missing_index(db, server.INDEX_QUERY_CHECKS) == []
+
+    run_against_fresh_database(check)
+
+
+@requires_mongod
+def test_changed_ttl_is_applied_in_place():
+    def registry(seconds):
+        return {"chat_messages": [IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl", expireAfterSeconds=seconds)]}
+
+    async def check(db):
+        await ensure_indexes(db, registry(90 * 86400))
+        assert await ensure_indexes(db, registry(30 * 86400)) == {}
+        info = await db.chat_messages.index_information()
+        assert info["timestamp_ttl"]["expireAfterSeconds"] == 30 * 86400
+
+    run_against_fresh_database(check)
+
+
+def test_unbuildable_index_does_not_block_the_rest():
+    registry = {"newsletter_subscriptions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("timestamp", ASCENDING)], name="timestamp"),
+    ]}
+
+    async def run():
+        db = AsyncMongoMockClient()["indexes_test"]
+        await db.newsletter_subscriptions.insert_many([
+            {"id": "a", "email": "dup@example.com", "timestamp": 1},
+            {"id": "b", "email": "dup@example.com", "timestamp": 2},
+        ])
+        drift = await ensure_indexes(db, registry)
+        return drift, await db.newsletter_subscriptions.index_information()
+
+    drift, deployed = asyncio.run(run())
+
+    assert drift == {"newsletter_subscriptions": {"missing": ["email_unique"], "changed": [], "extra": []}}
+    assert {"id_unique", "timestamp"} <= set(deployed)
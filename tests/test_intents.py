@@ -0,0 +1,101 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from intents import SCAN_KEYWORDS, IntentMatcher, ReloadingIntentMatcher
+
+TABLE = Path(__file__).resolve().parents[1] / "backend" / "intents.json"
+
+# Small tables are scanned keyword by keyword, larger ones tokenized; both must agree
+STRATEGIES = pytest.mark.parametrize("scan_keywords", [SCAN_KEYWORDS, 0], ids=["scan", "tokens"])
+
+
+@pytest.fixture(scope="module", params=[SCAN_KEYWORDS, 0], ids=["scan", "tokens"])
+def matcher(request):
+    table = json.loads(TABLE.read_text(encoding="utf-8"))
+    return IntentMatcher(table["intents"], table["fallback"], scan_keywords=request.param)
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("How much are your prices?", "pricing"),
+    ("Send me your costs", "pricing"),
+    ("Can I get a quote?", "pricing"),
+    ("Can you build websites?", "web"),
+    ("I want to automate invoicing", "ai"),
+    ("Do you do artificial intelligence?", "ai"),
+    ("Can we book a few meetings or calls?", "contact"),
+    ("Show me recent projects", "portfolio"),
+    ("What's on offer?", "services"),
+])
+def test_inflected_keywords_match(matcher, message, intent):
+    assert matcher.match(message) == intent
+
+
+def test_keywords_match_whole_words_only(matcher):
+    # "ai" must not match inside "said", and stems only match word starts
+    assert matcher.match("She said hello") is None
+    assert matcher.match("Hello there") is None
+    assert matcher.respond("She said hello") == matcher.fallback
+
+
+def test_higher_priority_intent_wins(matcher):
+    # pricing (50) outranks web (30) wherever the words appear
+    assert matcher.match("website pricing") == "pricing"
+    assert matcher.match("pricing for a website") == "pricing"
+
+
+@STRATEGIES
+def test_earlier_intent_wins_priority_ties(scan_keywords):
+    intents = [
+        {"name": "first", "priority": 1, "keywords": ["shared"], "response": "1"},
+        {"name": "second", "priority": 1, "keywords": ["shared", "own"], "response": "2"},
+    ]
+    matcher = IntentMatcher(intents, "fallback", scan_keywords=scan_keywords)
+    assert matcher.match("shared") == "first"
+    assert matcher.match("own shared") == "first"
+    assert matcher.match("own") == "second"
+
+
+@STRATEGIES
+def test_phrases_match_consecutive_words(scan_keywords):
+    intents = [
+        {"name": "ml", "priority": 2, "keywords": ["machine learning"], "response": "ml"},
+        {"name": "generic", "priority": 1, "keywords": ["learning"], "response": "generic"},
+    ]
+    matcher = IntentMatcher(intents, "fallback", scan_keywords=scan_keywords)
+    assert matcher.match("Tell me about Machine Learning!") == "ml"
+    assert matcher.match("learning about a machine") == "generic"
+    assert matcher.match("machine") is None
+
+
+def test_whole_word_hit_after_partial_ones(matcher):
+    # The first occurrences of "ai" are inside words; the last one counts
+    assert matcher.match("I said again: ai") == "ai"
+    assert matcher.match("said " * 1000) is None
+
+
+def test_follow_up_uses_recent_intent(matcher):
+    assert matcher.reply("yes please", ["pricing", "web"])[0] == "pricing"
+    assert matcher.reply("yes please", [None, "unknown"]) == (None, matcher.fallback)
+
+
+def test_reload_picks_up_changes_and_keeps_table_on_bad_file(tmp_path):
+    path = tmp_path / "intents.json"
+
+    def write(content, mtime):
+        path.write_text(content, encoding="utf-8")
+        os.utime(path, (mtime, mtime))
+
+    table = {"fallback": "fallback", "intents": [{"name": "hi", "keywords": ["hello"], "response": "hi there"}]}
+    write(json.dumps(table), 1_000_000)
+    reloading = ReloadingIntentMatcher(path, check_interval=0)
+    assert reloading.respond("hello") == "hi there"
+
+    table["intents"][0]["response"] = "welcome"
+    write(json.dumps(table), 1_000_001)
+    assert reloading.respond("hello") == "welcome"
+
+    write("{not json", 1_000_002)
+    assert reloading.respond("hello") == "welcome"
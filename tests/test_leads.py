@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+
+def test_concurrent_claims_take_distinct_leads_oldest_first(server):
+    start = datetime(2024, 1, 1)
+    leads = [
+        {"id": f"c{n}", "name": f"Lead {n}", "email": f"lead{n}@example.com", "message": "hello",
+         "status": "new", "version": 0, "timestamp": start + timedelta(minutes=n)}
+        for n in range(5)
+    ]
+
+    async def run():
+        # Stored newest first, so natural order disagrees with queue order
+        await server.db.contact_forms.insert_many([dict(lead) for lead in reversed(leads)])
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*[
+                client.post("/api/contact/claim", json={"assigned_to": f"admin-{n}"}) for n in range(7)
+            ])
+        stored = await server.db.contact_forms.find({}, {"_id": 0, "id": 1, "assigned_to": 1}).to_list(None)
+        return responses, {lead["id"]: lead["assigned_to"] for lead in stored}
+
+    responses, assigned = asyncio.run(run())
+
+    claimed = [response.json() for response in responses if response.status_code == 200]
+    assert sorted(lead["id"] for lead in claimed) == [f"c{n}" for n in range(5)]
+    assert [response.status_code for response in responses].count(404) == 2
+    # Each response describes the lead that was actually updated
+    for lead in claimed:
+        assert lead["status"] == "in_progress" and lead["version"] == 1
+        assert assigned[lead["id"]] == lead["assigned_to"]
+    assert "_id" not in claimed[0]
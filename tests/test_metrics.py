@@ -0,0 +1,62 @@
+import sys
+import threading
+
+from metrics import Histogram, MetricsRegistry
+
+
+def test_new_series_from_other_threads_while_rendering():
+    registry = MetricsRegistry()
+    errors = []
+    done = threading.Event()
+
+    def observe(worker):
+        try:
+            for n in range(2000):
+                registry.observe("mongodb_command_duration_seconds", (("command", "find"), ("collection", f"c{worker}-{n}")), 0.001)
+        except Exception as e:
+            errors.append(e)
+
+    def render():
+        try:
+            while not done.is_set():
+                registry.render()
+        except Exception as e:
+            errors.append(e)
+
+    # Switch threads as often as possible so a render overlaps new series
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        renderer = threading.Thread(target=render)
+        renderer.start()
+        workers = [threading.Thread(target=observe, args=(worker,)) for worker in range(4)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        done.set()
+        renderer.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert registry.render().count("mongodb_command_duration_seconds_count{") == 8000
+
+
+def test_render_reports_histogram_totals():
+    registry = MetricsRegistry()
+    labels = (("method", "GET"), ("route", "/api/"))
+    for value in (0.001, 0.002, 0.3):
+        registry.observe("http_request_duration_seconds", labels, value)
+    output = registry.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/"} 3' in output
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/",le="+Inf"} 3' in output
+
+
+def test_snapshot_is_independent_of_later_observations():
+    histogram = Histogram()
+    histogram.observe(0.01)
+    snapshot = histogram.snapshot()
+    histogram.observe(0.02)
+    assert (snapshot.count, histogram.count) == (1, 2)
+    assert snapshot.quantile(0.5) > 0
@@ -0,0 +1,36 @@
+import asyncio
+from datetime import datetime
+
+
+def test_startup_merges_case_variants_before_building_the_unique_index(server):
+    async def scenario():
+        await server.db.newsletter_subscriptions.insert_many([
+            {"id": "legacy", "email": "Foo@x.com", "status": "active", "timestamp": datetime(2023, 1, 1)},
+            {"id": "current", "email": "foo@x.com", "status": "active", "timestamp": datetime(2024, 1, 1)},
+            {"id": "other", "email": "Bar@X.com", "status": "unsubscribed", "timestamp": datetime(2023, 6, 1)},
+        ])
+        await server._initialize_database()
+        rows = await server.db.newsletter_subscriptions.find({}, {"_id": 0, "id": 1, "email": 1}).to_list(None)
+        indexes = await server.db.newsletter_subscriptions.index_information()
+        return rows, indexes
+
+    rows, indexes = asyncio.run(scenario())
+
+    assert sorted((row["id"], row["email"]) for row in rows) == [("current", "foo@x.com"), ("other", "bar@x.com")]
+    assert indexes["email_unique"]["unique"] is True
+
+
+def test_newest_case_variant_wins_when_none_is_lowercase(server):
+    async def scenario():
+        await server.db.newsletter_subscriptions.insert_many([
+            {"id": "old", "email": "FOO@x.com", "status": "unsubscribed", "timestamp": datetime(2022, 1, 1)},
+            {"id": "new", "email": "Foo@x.com", "status": "active", "timestamp": datetime(2023, 1, 1)},
+        ])
+        changed = await server._lowercase_newsletter_emails()
+        rows = await server.db.newsletter_subscriptions.find({}, {"_id": 0, "id": 1, "email": 1}).to_list(None)
+        return changed, rows
+
+    changed, rows = asyncio.run(scenario())
+
+    assert changed == 2
+    assert rows == [{"id": "new", "email": "foo@x.com"}]
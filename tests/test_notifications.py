@@ -0,0 +1,84 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import AutoReconnect
+
+from notifications import NotificationOutbox, render
+
+
+class StubPool:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def close(self):
+        pass
+
+
+class BlipCollection:
+    """Hands out queued jobs and fails the first status update after a send"""
+
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.updates = []
+        self.failures = 1
+
+    async def find_one_and_update(self, *args, **kwargs):
+        return self.jobs.pop(0) if self.jobs else None
+
+    async def update_one(self, query, update):
+        if self.failures:
+            self.failures -= 1
+            raise AutoReconnect("connection reset")
+        self.updates.append((query["id"], update["$set"]["status"]))
+
+
+def _job(job_id, kind="contact_form", payload=None):
+    return {"id": job_id, "kind": kind, "payload": payload or {"name": "Ada"}, "attempts": 0}
+
+
+def test_worker_survives_a_failed_status_update():
+    async def run():
+        pool = StubPool()
+        collection = BlipCollection([_job("first")])
+        outbox = NotificationOutbox({"notification_outbox": collection}, pool, "app@example.com", "ops@example.com",
+                                    workers=1, poll_interval=0.01)
+        outbox.start()
+        await asyncio.sleep(0.05)
+        collection.jobs.append(_job("second"))
+        await asyncio.sleep(0.05)
+        worker = outbox._tasks[0]
+        assert not worker.done()
+        await outbox.stop()
+        return pool, collection
+
+    pool, collection = asyncio.run(run())
+
+    assert len(pool.sent) == 2
+    assert collection.updates == [("second", "sent")]
+
+
+def test_line_breaks_in_submitted_values_do_not_reach_headers():
+    message = render("contact_form", {"name": "Eve\r\nBcc: victim@example.com"}, "app@example.com", "ops@example.com")
+
+    assert message["Subject"] == "New contact form submission from Eve Bcc: victim@example.com"
+    assert message["Bcc"] is None
+
+
+def test_unrenderable_job_is_dead_lettered_without_retries():
+    async def run():
+        db = AsyncMongoMockClient()["outbox_test"]
+        outbox = NotificationOutbox(db, StubPool(), "app@example.com", "ops@example.com", workers=1, poll_interval=0.01)
+        await outbox.enqueue("unknown_kind", {"name": "Ada"})
+        outbox.start()
+        await asyncio.sleep(0.05)
+        await outbox.stop()
+        return await db.notification_outbox.find_one({}, {"_id": 0})
+
+    job = asyncio.run(run())
+
+    assert job["status"] == "dead"
+    assert job["attempts"] == 1
+    assert "unknown_kind" in job["last_error"]
@@ -0,0 +1,73 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+from pydantic import BaseModel
+
+from pagination import decode_cursor, encode_cursor, fetch_page, stream_ndjson
+
+START = datetime(2024, 1, 1, 12, 0, 0, 123000)
+
+
+class Row(BaseModel):
+    id: str
+    timestamp: datetime
+    kind: str
+
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor({"timestamp": START, "id": "row-7"})) == (START, "row-7")
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "e30", encode_cursor({"timestamp": START, "id": "x"})[:-4]])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+async def seeded(docs):
+    collection = AsyncMongoMockClient()["pagination_test"]["rows"]
+    await collection.insert_many([dict(doc) for doc in docs])
+    return collection
+
+
+def all_pages(docs, limit, query=None):
+    async def run():
+        collection = await seeded(docs)
+        pages, cursor = [], None
+        while True:
+            page, cursor = await fetch_page(collection, query or {}, cursor, limit)
+            pages.append([doc["id"] for doc in page])
+            if cursor is None:
+                return pages
+    return asyncio.run(run())
+
+
+def test_rows_sharing_a_timestamp_are_split_across_pages_by_id():
+    # Five rows written in the same millisecond, plus one older and one newer
+    docs = [{"id": f"r{n}", "timestamp": START, "kind": "a"} for n in range(5)]
+    docs.append({"id": "older", "timestamp": START - timedelta(seconds=1), "kind": "a"})
+    docs.append({"id": "newer", "timestamp": START + timedelta(seconds=1), "kind": "a"})
+
+    assert all_pages(docs, 2) == [["newer", "r4"], ["r3", "r2"], ["r1", "r0"], ["older"]]
+
+
+def test_base_query_is_kept_across_pages():
+    docs = [{"id": f"r{n}", "timestamp": START + timedelta(seconds=n), "kind": "ab"[n % 2]} for n in range(6)]
+
+    assert all_pages(docs, 2, {"kind": "a"}) == [["r4", "r2"], ["r0"]]
+
+
+def test_stream_resumes_after_the_cursor():
+    docs = [{"id": f"r{n}", "timestamp": START, "kind": "a"} for n in range(4)]
+
+    async def run():
+        collection = await seeded(docs)
+        cursor = encode_cursor(docs[2])
+        return [json.loads(line)["id"] async for line in stream_ndjson(collection, {}, cursor, Row)]
+
+    assert asyncio.run(run()) == ["r1", "r0"]
@@ -0,0 +1,31 @@
+import pytest
+from starlette.requests import Request
+
+from rate_limit import client_ip
+
+
+def make_request(peer, forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": (peer, 5000)})
+
+
+@pytest.mark.parametrize("peer, forwarded_for, expected", [
+    # Direct connection
+    ("203.0.113.7", None, "203.0.113.7"),
+    # uvicorn trusted the proxy and already replaced the peer with the visitor
+    ("203.0.113.7", "203.0.113.7, 10.0.0.2", "203.0.113.7"),
+    # Unlisted private proxy: keyed on the hop it appended, not on its own address
+    ("10.0.0.2", "203.0.113.7", "203.0.113.7"),
+    ("127.0.0.1", "203.0.113.7", "203.0.113.7"),
+    # Whatever the client put in front of that hop is ignored
+    ("10.0.0.2", "1.2.3.4, 203.0.113.7", "203.0.113.7"),
+    # A public peer sending the header is keyed on itself, not on what it claims
+    ("8.8.8.8", "203.0.113.7", "8.8.8.8"),
+])
+def test_client_ip_uses_peer_unless_it_is_an_unlisted_proxy(peer, forwarded_for, expected):
+    assert client_ip(make_request(peer, forwarded_for)) == expected
+
+
+def test_client_ip_can_trust_first_forwarded_address():
+    request = make_request("10.0.0.2", "203.0.113.7, 10.0.0.1")
+    assert client_ip(request, trust_forwarded_for=True) == "203.0.113.7"
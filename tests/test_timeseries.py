@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import timeseries
+from timeseries import TimeseriesRollups
+
+NOW = datetime(2024, 3, 10, 12, 30)
+
+
+class FrozenDatetime(datetime):
+    now_value = NOW
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now_value
+
+
+class StubRollups(TimeseriesRollups):
+    """Counts from an in-memory list of timestamps instead of a $group pipeline"""
+
+    def __init__(self, db, timestamps, **kwargs):
+        super().__init__(db, {"contact_forms": {"collection": "contact_forms"}}, **kwargs)
+        self.timestamps = timestamps
+        self.calls = []
+
+    async def aggregate(self, metric, granularity, start, end):
+        self.calls.append((start, end))
+        buckets = {}
+        for moment in self.timestamps:
+            if start <= moment < end:
+                bucket = timeseries.bucket_start(moment, granularity)
+                buckets.setdefault(bucket, {"count": 0})["count"] += 1
+        return buckets
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(timeseries, "datetime", FrozenDatetime)
+    FrozenDatetime.now_value = NOW
+    yield FrozenDatetime
+
+
+def make_rollups(timestamps, grace=timedelta(minutes=1)):
+    return StubRollups(AsyncMongoMockClient()["test"], timestamps, grace=grace)
+
+
+def hours(first, last):
+    return [datetime(2024, 3, 10, hour) for hour in range(first, last)]
+
+
+def counts(series):
+    return {row["bucket"].hour: row["count"] for row in series}
+
+
+def coverage(rollups):
+    doc = asyncio.run(rollups.rollups.find_one({"_id": "coverage:contact_forms:hour"}))
+    return (doc["since"].hour, doc["until"].hour) if doc else None
+
+
+def test_closed_buckets_are_stored_and_not_aggregated_again():
+    rollups = make_rollups(hours(0, 13))
+    series = asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 6), NOW))
+    assert counts(series) == {hour: 1 for hour in range(6, 13)}
+    assert [row["closed"] for row in series] == [True] * 6 + [False]
+    assert coverage(rollups) == (6, 12)
+
+    rollups.calls.clear()
+    series = asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 8), NOW))
+    assert counts(series) == {hour: 1 for hour in range(8, 13)}
+    # Only the open bucket is read from the raw data
+    assert rollups.calls == [(datetime(2024, 3, 10, 12), datetime(2024, 3, 10, 13))]
+
+
+def test_coverage_extends_on_both_sides():
+    rollups = make_rollups(hours(0, 13))
+    asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 6), datetime(2024, 3, 10, 8)))
+    assert coverage(rollups) == (6, 9)
+
+    rollups.calls.clear()
+    series = asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 3), NOW))
+    assert counts(series) == {hour: 1 for hour in range(3, 13)}
+    assert coverage(rollups) == (3, 12)
+    # Only the gaps before and after the covered range are aggregated
+    assert rollups.calls == [
+        (datetime(2024, 3, 10, 3), datetime(2024, 3, 10, 6)),
+        (datetime(2024, 3, 10, 9), datetime(2024, 3, 10, 12)),
+        (datetime(2024, 3, 10, 12), datetime(2024, 3, 10, 13)),
+    ]
+
+
+def test_disjoint_range_resets_coverage():
+    rollups = make_rollups(hours(0, 13))
+    asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 9), datetime(2024, 3, 10, 10)))
+    assert coverage(rollups) == (9, 11)
+
+    series = asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 2), datetime(2024, 3, 10, 4)))
+    assert counts(series) == {2: 1, 3: 1, 4: 1}
+    # A gap between 5 and 9 was never aggregated, so the old range cannot be kept
+    assert coverage(rollups) == (2, 5)
+
+
+def test_bucket_within_grace_period_is_not_stored(frozen_clock):
+    timestamps = hours(0, 12)
+    rollups = make_rollups(timestamps, grace=timedelta(minutes=5))
+    frozen_clock.now_value = datetime(2024, 3, 10, 12, 2)
+
+    series = asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 10), frozen_clock.now_value))
+    assert counts(series) == {10: 1, 11: 1, 12: 0}
+    assert coverage(rollups) == (10, 11)
+
+    # A row for 11:59 lands after the bucket closed, but within the grace period
+    timestamps.append(datetime(2024, 3, 10, 11, 59))
+    frozen_clock.now_value = datetime(2024, 3, 10, 12, 10)
+    series = asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 10), frozen_clock.now_value))
+    assert counts(series) == {10: 1, 11: 2, 12: 0}
+    assert coverage(rollups) == (10, 12)
+
+
+def test_closed_buckets_are_stored_in_one_write(monkeypatch):
+    rollups = make_rollups(hours(0, 13))
+    writes = []
+    collection = rollups.rollups
+    bulk_write = collection.bulk_write
+
+    async def counting_bulk_write(requests, **kwargs):
+        writes.append(len(requests))
+        return await bulk_write(requests, **kwargs)
+
+    monkeypatch.setattr(collection, "bulk_write", counting_bulk_write)
+    monkeypatch.setattr(type(rollups), "rollups", property(lambda self: collection))
+
+    asyncio.run(rollups.series("contact_forms", "hour", datetime(2024, 3, 10, 0), NOW))
+    assert writes == [12]
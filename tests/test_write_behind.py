@@ -0,0 +1,127 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from write_behind import WriteBehindQueue
+
+
+class FakeCollection:
+    name = "fake"
+
+    def __init__(self, failures=0, error=AutoReconnect("connection refused")):
+        self.failures = failures
+        self.error = error
+        self.attempts = 0
+        self.documents = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise self.error
+        self.documents.extend(documents)
+
+
+def test_documents_in_a_filling_batch_count_as_pending():
+    async def run():
+        collection = FakeCollection()
+        queue = WriteBehindQueue(collection, flush_interval=0.5)
+        queue.start()
+        for n in range(5):
+            await queue.put({"n": n})
+        await asyncio.sleep(0.05)
+        assert collection.documents == []
+        assert queue.pending == 5
+        await queue.drain()
+        assert queue.pending == 0
+        assert len(collection.documents) == 5
+
+    asyncio.run(run())
+
+
+def test_batch_is_retried_after_a_failed_write():
+    async def run():
+        written = []
+
+        async def on_written(n):
+            written.append(n)
+
+        collection = FakeCollection(failures=2)
+        queue = WriteBehindQueue(collection, flush_interval=0.01, retry_backoff=0.01, on_written=on_written)
+        queue.start()
+        for n in range(5):
+            await queue.put({"n": n})
+        await asyncio.sleep(0.02)
+        # Still waiting on the retries: nothing written, nothing forgotten
+        assert queue.pending == 5
+        await queue.drain()
+        assert collection.attempts == 3
+        assert [document["n"] for document in collection.documents] == [0, 1, 2, 3, 4]
+        assert written == [5]
+        assert queue.pending == 0
+
+    asyncio.run(run())
+
+
+def test_batch_is_dropped_once_retries_are_exhausted():
+    async def run():
+        written = []
+
+        async def on_written(n):
+            written.append(n)
+
+        collection = FakeCollection(failures=10)
+        queue = WriteBehindQueue(collection, flush_interval=0.01, max_retries=2, retry_backoff=0.001, on_written=on_written)
+        queue.start()
+        await queue.put({"n": 1})
+        await queue.drain()
+        assert collection.attempts == 3
+        assert written == []
+        assert queue.pending == 0
+
+    asyncio.run(run())
+
+
+def test_retry_counts_documents_written_by_an_earlier_attempt():
+    async def run():
+        written = []
+
+        async def on_written(n):
+            written.append(n)
+
+        # The first attempt timed out after inserting one document; the retry reports it as a duplicate
+        duplicate = BulkWriteError({"nInserted": 2, "writeErrors": [{"index": 0, "code": 11000, "errmsg": "duplicate key"}]})
+        collection = FakeCollection()
+        attempts = [AutoReconnect("timed out"), duplicate]
+
+        async def insert_many(documents, ordered=True):
+            collection.attempts += 1
+            raise attempts.pop(0)
+
+        collection.insert_many = insert_many
+        queue = WriteBehindQueue(collection, flush_interval=0.01, retry_backoff=0.001, on_written=on_written)
+        queue.start()
+        for n in range(3):
+            await queue.put({"n": n})
+        await queue.drain()
+        assert written == [3]
+
+    asyncio.run(run())
+
+
+def test_drain_gives_up_after_its_timeout():
+    async def run():
+        collection = FakeCollection(failures=100)
+        queue = WriteBehindQueue(collection, flush_interval=0.01, retry_backoff=10)
+        queue.start()
+        for n in range(3):
+            await queue.put({"n": n})
+        await asyncio.sleep(0.05)
+        started = asyncio.get_running_loop().time()
+        await queue.drain(timeout=0.1)
+        return asyncio.get_running_loop().time() - started, queue.pending, collection.documents
+
+    elapsed, pending, documents = asyncio.run(run())
+
+    assert elapsed < 1
+    assert pending == 0
+    assert documents == []